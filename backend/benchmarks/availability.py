@@ -0,0 +1,78 @@
+"""
+Measures the provider availability index on a synthetic directory: build
+time, per-department checks, and directory-wide "which <specialty> is open
+<day> <time>" searches, against re-parsing every hours string per question.
+
+Usage (from backend/):
+    python benchmarks/availability.py --providers 20000 --queries 500
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from common import add_src_to_path, summarize
+from generate_data import SPECIALTIES, make_providers
+
+add_src_to_path()
+
+from core.availability import AvailabilityIndex, is_open, parse_hours  # noqa: E402
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - started) * 1000
+
+def scan_directory(providers, day, start, end, specialty):
+    """The unindexed approach: parse and compare every department's hours for each question."""
+    results = []
+    for provider in providers:
+        if provider["specialty"] != specialty:
+            continue
+        for dept in provider["departments"]:
+            if is_open(parse_hours.__wrapped__(dept["hours"]), day, start, end):
+                results.append((provider["provider_id"], dept["name"]))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--providers", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    providers = make_providers(args.providers, rng)
+    index, build_ms = timed(AvailabilityIndex, providers)
+    questions = [(rng.randrange(7), rng.randrange(7 * 60, 18 * 60, 15), rng.choice(SPECIALTIES))
+                 for _ in range(args.queries)]
+    departments = [(p["provider_id"], d["name"]) for p in providers for d in p["departments"]]
+
+    point_latencies = []
+    for day, minute, _ in questions:
+        provider_id, department = rng.choice(departments)
+        point_latencies.append(timed(index.is_available, provider_id, department, day, minute)[1])
+
+    search_latencies, scan_latencies = [], []
+    for day, minute, specialty in questions:
+        found, elapsed = timed(index.find_open, day, minute, specialty=specialty)
+        search_latencies.append(elapsed)
+        expected, elapsed = timed(scan_directory, providers, day, minute, minute + 1, specialty)
+        scan_latencies.append(elapsed)
+        # Both list matches in directory order, so they must agree exactly.
+        assert found == expected, (day, minute, specialty)
+
+    report = {
+        "providers": args.providers,
+        "departments": len(index),
+        "build_ms": build_ms,
+        "is_available": summarize(point_latencies),
+        "find_open": summarize(search_latencies),
+        "scan_and_parse": summarize(scan_latencies),
+    }
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+if __name__ == "__main__":
+    main()
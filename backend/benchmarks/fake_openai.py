@@ -0,0 +1,182 @@
+"""
+Local stand-in for the OpenAI endpoints the backend uses: chat completions
+(streaming and non-streaming), embeddings, Whisper transcriptions and TTS.
+Responses are deterministic and latency is configurable, so load tests are
+reproducible and cost nothing.
+
+Usage:
+    python benchmarks/fake_openai.py --port 8089 --chat-latency-ms 300 --tokens-per-sec 80
+    export OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=sk-fake
+"""
+import argparse
+import base64
+import hashlib
+import json
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("the patient should arrive early and bring insurance card for the visit with provider "
+         "hours are listed below please confirm the appointment time with the nurse").split()
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    settings = None  # argparse namespace, set in main()
+    counters = {}
+    counters_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.counters_lock:
+                self._send_json(dict(self.counters))
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        route = self.path.split("?")[0].rstrip("/")
+        handlers = {
+            "/v1/chat/completions": self._chat,
+            "/v1/embeddings": self._embeddings,
+            "/v1/audio/transcriptions": self._transcription,
+            "/v1/audio/speech": self._speech,
+        }
+        handler = handlers.get(route)
+        if handler is None:
+            self._send_json({"error": {"message": f"unknown route {route}"}}, status=404)
+            return
+        with self.counters_lock:
+            self.counters[route] = self.counters.get(route, 0) + 1
+        handler(body)
+
+    def _chat(self, body):
+        request = json.loads(body)
+        prompt_chars = sum(len(m.get("content") or "") for m in request.get("messages", []))
+        tokens = [WORDS[i % len(WORDS)] + " " for i in range(self.settings.completion_tokens)]
+        usage = {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_chars // 4 + len(tokens),
+        }
+        base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": request.get("model", "fake")}
+        time.sleep(self.settings.chat_latency_ms / 1000)
+        token_delay = 1 / self.settings.tokens_per_sec if self.settings.tokens_per_sec > 0 else 0
+
+        if not request.get("stream"):
+            time.sleep(token_delay * len(tokens))
+            self._send_json(dict(base, object="chat.completion", usage=usage, choices=[{
+                "index": 0, "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "".join(tokens)},
+            }]))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for token in tokens:
+            self._write_chunk(self._sse(dict(base, object="chat.completion.chunk", choices=[{
+                "index": 0, "finish_reason": None, "delta": {"content": token},
+            }])))
+            time.sleep(token_delay)
+        self._write_chunk(self._sse(dict(base, object="chat.completion.chunk", usage=usage, choices=[{
+            "index": 0, "finish_reason": "stop", "delta": {},
+        }])))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _embeddings(self, body):
+        request = json.loads(body)
+        inputs = request["input"] if isinstance(request["input"], list) else [request["input"]]
+        time.sleep(self.settings.embedding_latency_ms / 1000)
+        data = []
+        for i, text in enumerate(inputs):
+            vector = fake_embedding(str(text), self.settings.embedding_dim)
+            if request.get("encoding_format") == "base64":
+                encoded = base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode("ascii")
+                data.append({"object": "embedding", "index": i, "embedding": encoded})
+            else:
+                data.append({"object": "embedding", "index": i, "embedding": vector})
+        tokens = sum(len(str(t)) // 4 for t in inputs)
+        self._send_json({"object": "list", "data": data, "model": request.get("model", "fake"),
+                         "usage": {"prompt_tokens": tokens, "total_tokens": tokens}})
+
+    def _transcription(self, body):
+        time.sleep(self.settings.transcription_latency_ms / 1000)
+        self._send_json({"text": f"Fake transcript of {len(body)} bytes of audio."})
+
+    def _speech(self, body):
+        request = json.loads(body)
+        time.sleep(self.settings.speech_latency_ms / 1000)
+        # Roughly 1 KB of "audio" per 10 characters, enough to exercise streaming and caching.
+        seed = hashlib.sha256(request.get("input", "").encode("utf-8")).digest()
+        audio = seed * max(1, len(request.get("input", "")) * 100 // len(seed))
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(len(audio)))
+        self.end_headers()
+        self.wfile.write(audio)
+
+    def _send_json(self, payload, status=200):
+        encoded = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    @staticmethod
+    def _sse(payload):
+        return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+def fake_embedding(text, dim):
+    """Deterministic unit vector derived from the text, so equal texts embed equally."""
+    values = []
+    counter = 0
+    while len(values) < dim:
+        digest = hashlib.sha256(f"{counter}:{text}".encode("utf-8")).digest()
+        values.extend((b - 127.5) / 127.5 for b in digest)
+        counter += 1
+    values = values[:dim]
+    norm = sum(v * v for v in values) ** 0.5 or 1.0
+    return [v / norm for v in values]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--chat-latency-ms", type=float, default=300, help="Delay before the first token.")
+    parser.add_argument("--tokens-per-sec", type=float, default=80, help="Completion token rate (0 = instant).")
+    parser.add_argument("--completion-tokens", type=int, default=120)
+    parser.add_argument("--embedding-latency-ms", type=float, default=80)
+    parser.add_argument("--embedding-dim", type=int, default=1536)
+    parser.add_argument("--transcription-latency-ms", type=float, default=500)
+    parser.add_argument("--speech-latency-ms", type=float, default=400)
+    return parser.parse_args(argv)
+
+def serve(settings):
+    """Starts the fake server in a daemon thread and returns it."""
+    FakeOpenAIHandler.settings = settings
+    server = ThreadingHTTPServer((settings.host, settings.port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    settings = parse_args()
+    FakeOpenAIHandler.settings = settings
+    server = ThreadingHTTPServer((settings.host, settings.port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    print(f"Fake OpenAI listening on http://{settings.host}:{settings.port}/v1", flush=True)
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
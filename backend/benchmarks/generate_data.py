@@ -0,0 +1,156 @@
+"""
+Generates scaled-up copies of data_sheet.json and patient_sheet.json for
+load testing, e.g. 10k providers and 1M patients. Output is written
+incrementally, so memory stays flat regardless of the patient count.
+
+Usage (from backend/):
+    python benchmarks/generate_data.py --providers 10000 --patients 1000000 --out /tmp/bench_data
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import date, timedelta
+
+FIRST_NAMES = ["Meredith", "Gregory", "Cristina", "Chris", "Temperance", "Derek", "Miranda", "Lisa", "James",
+               "Allison", "Robert", "Elliot", "John", "Perry", "Carla", "Seeley", "Camille", "Jack", "Kate",
+               "Sawyer", "Juliet", "Izzie", "George", "Alex", "Callie", "Arizona", "Owen", "April", "Jackson", "Amelia"]
+LAST_NAMES = ["Grey", "House", "Yang", "Perry", "Brennan", "Shepherd", "Bailey", "Cuddy", "Wilson", "Cameron",
+              "Chase", "Reid", "Dorian", "Cox", "Espinosa", "Booth", "Saroyan", "Shephard", "Austen", "Ford",
+              "Burke", "Stevens", "Omalley", "Karev", "Torres", "Robbins", "Hunt", "Kepner", "Avery", "Lin"]
+SPECIALTIES = ["Primary Care", "Orthopedics", "Surgery", "Cardiology", "Dermatology", "Neurology", "Pediatrics"]
+HOURS = ["M-F 9am-5pm", "M-W 9am-5pm", "Th-F 9am-5pm", "Tu-Th 10am-4pm", "M-F 8am-6pm", "Sa 9am-1pm",
+         "Mon–Wed 09:00–17:00", "M-F 7:30am-12pm; Sa 9am-12pm"]
+STREETS = ["Main St", "Maple St", "Pine St", "Elm St", "Oak Ave", "Cedar Rd"]
+CITIES = ["Raleigh, NC 27601", "Greensboro, NC 27401", "Charlotte, NC 28202", "Winston-Salem, NC 27101"]
+PAYERS = ["Medicaid", "United Health Care", "Blue Cross Blue Shield of North Carolina", "Aetna", "Cigna",
+          "Humana", "Tricare"]
+STATUSES = ["completed", "completed", "completed", "noshow", "cancelled"]
+
+def make_providers(count, rng):
+    providers = []
+    seen = set()
+    for i in range(count):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        provider_id = f"{last.lower()}_{first.lower()}"
+        if provider_id in seen:
+            # Suffix the last name so generated names and ids stay unique and matchable.
+            last = f"{last}{i}"
+            provider_id = f"{last.lower()}_{first.lower()}"
+        seen.add(provider_id)
+        departments = []
+        for d in range(rng.randint(1, 3)):
+            departments.append({
+                "name": f"{last} {rng.choice(SPECIALTIES)} Clinic {d + 1}",
+                "phone": f"({rng.randint(200, 999)}) 555-{rng.randint(1000, 9999)}",
+                "address": f"{rng.randint(1, 999)} {rng.choice(STREETS)}, {rng.choice(CITIES)}",
+                "hours": rng.choice(HOURS),
+            })
+        providers.append({
+            "provider_id": provider_id,
+            "name": f"{last}, {first}",
+            "certification": rng.choice(["MD", "FNP", "PhD, MD"]),
+            "specialty": rng.choice(SPECIALTIES),
+            "departments": departments,
+        })
+    return providers
+
+def make_patient(patient_id, providers, rng, max_appointments):
+    today = date.today()
+    appointments = []
+    for _ in range(rng.randint(0, max_appointments)):
+        provider = rng.choice(providers)
+        dept = rng.choice(provider["departments"])
+        appointments.append({
+            "date": (today - timedelta(days=rng.randint(1, 10 * 365))).isoformat(),
+            "time": f"{rng.randint(8, 16):02d}:{rng.choice(['00', '15', '30', '45'])}:00",
+            "timezone": "America/New_York",
+            "provider_id": provider["provider_id"],
+            "provider": provider["name"],
+            "department": dept["name"],
+            "location_name": dept["name"],
+            "location_address": dept["address"],
+            "status": rng.choice(STATUSES),
+        })
+    referrals = []
+    for _ in range(rng.randint(0, 2)):
+        provider = rng.choice(providers)
+        dept = rng.choice(provider["departments"])
+        referrals.append({
+            "provider_id": provider["provider_id"],
+            "name": provider["name"],
+            "specialty": provider["specialty"],
+            "department": dept["name"],
+            "location_name": dept["name"],
+            "location_address": dept["address"],
+            "hours": dept["hours"],
+        })
+    payer = rng.choice(PAYERS)
+    return {
+        "id": patient_id,
+        "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "dob": (date(1940, 1, 1) + timedelta(days=rng.randint(0, 80 * 365))).isoformat(),
+        "pcp": rng.choice(providers)["name"],
+        "ehrId": f"{patient_id:08x}",
+        "insurance": {
+            "primary": {"payer": payer, "plan": f"{payer} Standard", "member_id": f"M{patient_id:09d}",
+                        "group_number": f"G{rng.randint(10000, 99999)}"},
+            "secondary": None,
+        },
+        "referred_providers": referrals,
+        "appointments": appointments,
+    }
+
+def write_data_sheet(path, template_path, providers):
+    with open(template_path, "r", encoding="utf-8") as f:
+        sheet = json.load(f)
+    sheet["ProviderDirectory"] = providers
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(sheet, f)
+
+def write_patients(path, count, providers, rng, max_appointments, fmt):
+    """Streams patients to disk as a patient_sheet.json document or as JSON lines."""
+    with open(path, "w", encoding="utf-8") as f:
+        if fmt == "json":
+            f.write('{"InitialPatientData": [\n')
+        for patient_id in range(1, count + 1):
+            record = json.dumps(make_patient(patient_id, providers, rng, max_appointments))
+            if fmt == "json":
+                f.write(record + (",\n" if patient_id < count else "\n"))
+            else:
+                f.write(record + "\n")
+        if fmt == "json":
+            f.write("]}\n")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--providers", type=int, default=10000)
+    parser.add_argument("--patients", type=int, default=1000000)
+    parser.add_argument("--max-appointments", type=int, default=12)
+    parser.add_argument("--format", choices=["json", "jsonl"], default="json",
+                        help="Patient output as a patient_sheet.json document or as JSON lines.")
+    parser.add_argument("--template", default=os.path.join(os.path.dirname(__file__), "..", "data_sheet.json"),
+                        help="Data sheet whose non-directory sections are copied.")
+    parser.add_argument("--out", required=True, help="Output directory.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    os.makedirs(args.out, exist_ok=True)
+    started = time.perf_counter()
+    providers = make_providers(args.providers, rng)
+    write_data_sheet(os.path.join(args.out, "data_sheet.json"), args.template, providers)
+    patient_file = "patient_sheet.json" if args.format == "json" else "patient_sheet.jsonl"
+    write_patients(os.path.join(args.out, patient_file), args.patients, providers, rng,
+                   args.max_appointments, args.format)
+    print(json.dumps({
+        "providers": args.providers,
+        "patients": args.patients,
+        "out": os.path.abspath(args.out),
+        "seconds": time.perf_counter() - started,
+    }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Closed-loop load scenarios against a running backend. Each scenario is
+driven by `--concurrency` worker threads issuing `--requests` requests in
+total, and the report gives throughput, error count and p50/p95/p99.
+
+Usage (from backend/):
+    python benchmarks/load_test.py --base-url http://127.0.0.1:5000 --scenarios patients,patient,chat
+"""
+import argparse
+import io
+import json
+import random
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import summarize
+
+CHAT_PROMPTS = [
+    "Is the patient's insurance accepted?",
+    "What are House's hours?",
+    "Is the patient new or established with Dr. Grey?",
+    "Book an appointment with House on Thursday at 3pm.",
+    "Which doctors treat bone problems?",
+    "What are the self-pay rates for orthopedics?",
+]
+
+def silent_wav(seconds=1, rate=8000):
+    """A minimal mono 16-bit WAV file used as the transcription payload."""
+    frames = b"\x00\x00" * int(seconds * rate)
+    header = b"RIFF" + struct.pack("<I", 36 + len(frames)) + b"WAVEfmt " + struct.pack(
+        "<IHHIIHH", 16, 1, 1, rate, rate * 2, 2, 16) + b"data" + struct.pack("<I", len(frames))
+    return header + frames
+
+class Scenarios:
+    """Request builders for each endpoint; every method issues one request and returns the response."""
+    def __init__(self, base_url, patient_ids, seed=0, batch_size=50):
+        self.base_url = base_url.rstrip("/")
+        self.patient_ids = patient_ids
+        self.batch_size = batch_size
+        self.audio = silent_wav()
+        self._local = threading.local()
+        self._seed = seed
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            self._local.rng = random.Random(self._seed + threading.get_ident())
+        return session, self._local.rng
+
+    def patients(self):
+        session, _ = self._session()
+        return session.get(f"{self.base_url}/patients")
+
+    def patient(self):
+        session, rng = self._session()
+        return session.get(f"{self.base_url}/patient/{rng.choice(self.patient_ids)}")
+
+    def chat(self):
+        session, rng = self._session()
+        return session.post(f"{self.base_url}/chat", json={
+            "prompt": rng.choice(CHAT_PROMPTS), "patient_id": rng.choice(self.patient_ids)})
+
+    def chat_stream(self):
+        session, rng = self._session()
+        response = session.post(f"{self.base_url}/chat/stream", stream=True, json={
+            "prompt": rng.choice(CHAT_PROMPTS), "patient_id": rng.choice(self.patient_ids)})
+        for _ in response.iter_content(chunk_size=None):
+            pass
+        return response
+
+    def chat_batch(self):
+        session, rng = self._session()
+        items = [{"prompt": rng.choice(CHAT_PROMPTS), "patient_id": rng.choice(self.patient_ids)}
+                 for _ in range(self.batch_size)]
+        response = session.post(f"{self.base_url}/chat/batch", stream=True, json={"items": items})
+        for _ in response.iter_content(chunk_size=None):
+            pass
+        return response
+
+    def transcribe(self):
+        session, _ = self._session()
+        return session.post(f"{self.base_url}/transcribe",
+                            files={"file": ("speech.wav", io.BytesIO(self.audio), "audio/wav")})
+
+    def synthesize(self):
+        session, rng = self._session()
+        return session.post(f"{self.base_url}/synthesize-speech", json={
+            "text": f"The appointment is confirmed for {rng.choice(['Monday', 'Tuesday', 'Thursday'])}."})
+
+ALL_SCENARIOS = ["patients", "patient", "chat", "chat_stream", "chat_batch", "transcribe", "synthesize"]
+
+def run_scenario(fn, total_requests, concurrency):
+    """
+    Runs `fn` `total_requests` times across `concurrency` threads and returns its
+    statistics. For chat scenarios it also counts answers per `X-Chat-Path` and
+    reports the share that did not need the LLM.
+    """
+    latencies = []
+    errors = 0
+    paths = {}
+    lock = threading.Lock()
+
+    def one(_):
+        nonlocal errors
+        started = time.perf_counter()
+        path = None
+        try:
+            response = fn()
+            ok = response.status_code < 400
+            path = response.headers.get("X-Chat-Path")
+        except requests.RequestException:
+            ok = False
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+            if path:
+                paths[path] = paths.get(path, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total_requests)))
+    wall = time.perf_counter() - started
+    stats = dict(summarize(latencies), errors=errors, concurrency=concurrency,
+                 wall_seconds=wall, throughput_rps=total_requests / wall if wall else 0.0)
+    if paths:
+        stats["paths"] = paths
+        stats["llm_offload_share"] = 1 - paths.get("rag", 0) / sum(paths.values())
+    return stats
+
+def run(base_url, scenarios, total_requests, concurrency, patient_ids, warmup=5, batch_size=50):
+    """Runs the named scenarios in order and returns {scenario: stats}."""
+    builder = Scenarios(base_url, patient_ids, batch_size=batch_size)
+    report = {}
+    for name in scenarios:
+        fn = getattr(builder, name)
+        for _ in range(warmup):
+            try:
+                fn()
+            except requests.RequestException:
+                pass
+        report[name] = run_scenario(fn, total_requests, concurrency)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--scenarios", default=",".join(ALL_SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-patient-id", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=50, help="Items per /chat/batch request.")
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout.")
+    args = parser.parse_args()
+
+    report = {
+        "base_url": args.base_url,
+        "scenarios": run(args.base_url, args.scenarios.split(","), args.requests, args.concurrency,
+                         list(range(1, args.max_patient_id + 1)), batch_size=args.batch_size),
+    }
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(encoded + "\n")
+    sys.stdout.write(encoded + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+End-to-end, reproducible benchmark run: starts the fake OpenAI server,
+generates (or reuses) a synthetic dataset, times database seeding and app
+startup with a cold and a warm vector index, serves the app in-process and
+runs the load scenarios. The full report is written as JSON so runs can be
+diffed to catch regressions.
+
+Usage (from backend/):
+    python benchmarks/run_benchmarks.py --providers 1000 --patients 20000 --output bench.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from common import SRC_DIR, add_src_to_path
+import fake_openai
+import generate_data
+import load_test
+
+def time_call(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+def build_app(data_dir, work_dir, extra_config):
+    add_src_to_path()
+    from api import create_app
+    config = {
+        "DATABASE_PATH": os.path.join(work_dir, "db", "patients.db"),
+        "DATA_SHEET_PATH": os.path.join(data_dir, "data_sheet.json"),
+        "VECTOR_DB_PATH": os.path.join(work_dir, "vector_db"),
+        "SCHEMA_PATH": os.path.join(SRC_DIR, "..", "schema.sql"),
+        "PATIENT_SHEET_PATH": os.path.join(data_dir, "patient_sheet.json"),
+        "OPENAI_API_KEY": os.environ["OPENAI_API_KEY"],
+    }
+    config.update(extra_config)
+    return create_app(config)
+
+def start_app(data_dir, work_dir, extra_config):
+    """Builds the app and runs the same warmup a server runs before it reports ready."""
+    app = build_app(data_dir, work_dir, extra_config)
+    from api import services
+    services.warmup(app)
+    ready, details = services.readiness(app)
+    if not ready:
+        raise RuntimeError(f"warmup failed: {details}")
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--providers", type=int, default=1000)
+    parser.add_argument("--patients", type=int, default=20000)
+    parser.add_argument("--data-dir", help="Reuse a directory produced by generate_data.py.")
+    parser.add_argument("--scenarios", default=",".join(load_test.ALL_SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--app-port", type=int, default=5057)
+    parser.add_argument("--config", default="{}", help="JSON overrides for the Flask config.")
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout.")
+    args, fake_argv = parser.parse_known_args()
+    fake_settings = fake_openai.parse_args(fake_argv)
+
+    fake_server = fake_openai.serve(fake_settings)
+    os.environ["OPENAI_BASE_URL"] = f"http://{fake_settings.host}:{fake_settings.port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake-benchmark")
+    os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+    report = {"settings": dict(vars(args), fake_openai=vars(fake_settings)), "timings_ms": {}}
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_dir = args.data_dir
+        if data_dir is None:
+            data_dir = os.path.join(work_dir, "data")
+            os.makedirs(data_dir)
+            rng = generate_data.random.Random(42)
+            providers = generate_data.make_providers(args.providers, rng)
+            generate_data.write_data_sheet(os.path.join(data_dir, "data_sheet.json"),
+                                           os.path.join(SRC_DIR, "..", "data_sheet.json"), providers)
+            _, report["timings_ms"]["generate_patients"] = time_call(lambda: generate_data.write_patients(
+                os.path.join(data_dir, "patient_sheet.json"), args.patients, providers, rng, 12, "json"))
+
+        extra_config = json.loads(args.config)
+        # Managers are built lazily, so each start is timed through warmup (until /readiness would say 200).
+        # The first start embeds and indexes the whole directory; the second finds it already in sync.
+        app, report["timings_ms"]["create_app_cold_index"] = time_call(
+            lambda: start_app(data_dir, work_dir, extra_config))
+        _, report["timings_ms"]["create_app_warm_index"] = time_call(
+            lambda: start_app(data_dir, work_dir, extra_config))
+
+        with app.app_context():
+            import db_utils
+            from api.db import get_db
+            db = get_db()
+            _, report["timings_ms"]["create_tables"] = time_call(
+                lambda: db_utils.create_tables(db, app.config["SCHEMA_PATH"]))
+            _, report["timings_ms"]["seed_patients"] = time_call(
+                lambda: db_utils.seed_data(db, app.config["PATIENT_SHEET_PATH"]))
+            patient_count = db.execute("SELECT COUNT(*) FROM patients").fetchone()[0]
+
+        from werkzeug.serving import make_server
+        server = make_server("127.0.0.1", args.app_port, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            report["scenarios"] = load_test.run(
+                f"http://127.0.0.1:{args.app_port}", args.scenarios.split(","), args.requests,
+                args.concurrency, list(range(1, patient_count + 1)))
+        finally:
+            server.shutdown()
+            fake_server.shutdown()
+
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(encoded + "\n")
+    sys.stdout.write(encoded + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Compares the Chroma and NumPy vector backends on identical synthetic
+embeddings: load time, resident memory, query latency and top-k agreement.
+
+Usage (from backend/):
+    PYTHONPATH=src python benchmarks/vector_backends.py --docs 10000 --queries 200
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from common import add_src_to_path, summarize
+
+add_src_to_path()
+
+def rss_bytes():
+    """Current resident set size, read from /proc when available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def make_corpus(n_docs, dim, seed):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n_docs, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"doc_{i}" for i in range(n_docs)]
+    documents = [f"Synthetic document {i}" for i in range(n_docs)]
+    metadatas = [{"source": "ProviderDirectory" if i % 4 else "Policy"} for i in range(n_docs)]
+    return ids, documents, vectors, metadatas
+
+def bench_numpy(path, corpus, queries, k, where, batch_size):
+    from core.vector_index import NumpyVectorIndex
+    ids, documents, vectors, metadatas = corpus
+    index = NumpyVectorIndex(path)
+    for start in range(0, len(ids), batch_size):
+        end = start + batch_size
+        index.upsert(ids[start:end], documents[start:end], vectors[start:end], metadatas[start:end])
+    index.flush()
+    del index
+
+    before = rss_bytes()
+    started = time.perf_counter()
+    index = NumpyVectorIndex(path)
+    load_ms = (time.perf_counter() - started) * 1000
+    return run_queries(index, queries, k, where, load_ms, before)
+
+def bench_chroma(path, corpus, queries, k, where, batch_size):
+    import chromadb
+    ids, documents, vectors, metadatas = corpus
+    client = chromadb.PersistentClient(path=path)
+    collection = client.get_or_create_collection(name="bench", embedding_function=None)
+    for start in range(0, len(ids), batch_size):
+        end = start + batch_size
+        collection.add(ids=ids[start:end], documents=documents[start:end],
+                       embeddings=vectors[start:end].tolist(), metadatas=metadatas[start:end])
+    del collection, client
+
+    before = rss_bytes()
+    started = time.perf_counter()
+    client = chromadb.PersistentClient(path=path)
+    collection = client.get_collection(name="bench")
+    load_ms = (time.perf_counter() - started) * 1000
+    return run_queries(collection, queries, k, where, load_ms, before)
+
+def run_queries(store, queries, k, where, load_ms, rss_before):
+    latencies = []
+    top_ids = []
+    for query in queries:
+        started = time.perf_counter()
+        result = store.query(query_embeddings=[query.tolist()], n_results=k, where=where)
+        latencies.append((time.perf_counter() - started) * 1000)
+        top_ids.append(result["ids"][0])
+
+    started = time.perf_counter()
+    store.query(query_embeddings=queries.tolist(), n_results=k, where=where)
+    batched_ms = (time.perf_counter() - started) * 1000
+    return {
+        "load_ms": load_ms,
+        "rss_delta_bytes": rss_bytes() - rss_before,
+        "query": summarize(latencies),
+        "batched_query_total_ms": batched_ms,
+    }, top_ids
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--where", default=None, help='JSON metadata filter, e.g. \'{"source": "ProviderDirectory"}\'')
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--backends", default="numpy,chroma")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.docs, args.dim, args.seed)
+    queries = make_corpus(args.queries, args.dim, args.seed + 1)[2]
+    where = json.loads(args.where) if args.where else None
+    runners = {"numpy": bench_numpy, "chroma": bench_chroma}
+
+    report = {"docs": args.docs, "dim": args.dim, "queries": args.queries, "k": args.k, "where": where, "backends": {}}
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.backends.split(","):
+            stats, top_ids = runners[name](os.path.join(tmp, name), corpus, queries, args.k, where, args.batch_size)
+            report["backends"][name] = stats
+            results[name] = top_ids
+
+    if len(results) == 2:
+        a, b = results.values()
+        # Chroma's HNSW index is approximate, so agreement is reported rather than asserted.
+        report["topk_agreement"] = statistics.fmean(len(set(x) & set(y)) / args.k for x, y in zip(a, b))
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+if __name__ == "__main__":
+    main()
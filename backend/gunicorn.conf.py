@@ -0,0 +1,20 @@
+# Gunicorn settings for the backend. The app is loaded once in the master with its managers
+# built and warmed (PRELOAD_SERVICES), then forked, so workers share that state copy-on-write.
+import gc
+import multiprocessing
+import os
+
+os.environ.setdefault("PRELOAD_SERVICES", "1")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+# Metrics are per worker and labelled with its pid (see core/metrics.py); aggregate them in queries.
+workers = int(os.getenv("GUNICORN_WORKERS", min(4, multiprocessing.cpu_count())))
+# Threads let streamed /chat responses wait on the LLM without blocking a whole worker.
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_app = True
+
+def when_ready(server):
+    # Move everything allocated during preload out of the GC's reach, so collections in
+    # workers do not touch (and un-share) those pages.
+    gc.freeze()
@@ -1,3 +1,9 @@
+DROP TABLE IF EXISTS patient_provider_status;
+DROP TABLE IF EXISTS referral_candidates;
+DROP TABLE IF EXISTS referrals;
+DROP TABLE IF EXISTS appointments;
+DROP TABLE IF EXISTS patient_insurance;
+DROP TABLE IF EXISTS patients_fts;
 DROP TABLE IF EXISTS patients;
 
 CREATE TABLE patients (
@@ -5,8 +11,96 @@ CREATE TABLE patients (
     name TEXT NOT NULL,
     dob TEXT NOT NULL,
     pcp TEXT,
-    ehrId TEXT,
-    insurance TEXT,
-    referred_providers TEXT, -- Stored as JSON string
-    appointments TEXT -- Stored as JSON string
+    ehrId TEXT
 );
+
+CREATE INDEX idx_patients_pcp ON patients (pcp, id);
+
+-- Prefix search on patient names for GET /patients?q=, kept in sync by the triggers below.
+CREATE VIRTUAL TABLE patients_fts USING fts5 (name, content='patients', content_rowid='id', prefix='2 3');
+
+CREATE TRIGGER patients_fts_insert AFTER INSERT ON patients BEGIN
+    INSERT INTO patients_fts (rowid, name) VALUES (new.id, new.name);
+END;
+
+CREATE TRIGGER patients_fts_delete AFTER DELETE ON patients BEGIN
+    INSERT INTO patients_fts (patients_fts, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+
+CREATE TRIGGER patients_fts_update AFTER UPDATE OF name ON patients BEGIN
+    INSERT INTO patients_fts (patients_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    INSERT INTO patients_fts (rowid, name) VALUES (new.id, new.name);
+END;
+
+CREATE TABLE patient_insurance (
+    patient_id INTEGER NOT NULL REFERENCES patients (id) ON DELETE CASCADE,
+    coverage TEXT NOT NULL, -- 'primary' or 'secondary'
+    payer TEXT,
+    plan TEXT,
+    member_id TEXT,
+    group_number TEXT,
+    PRIMARY KEY (patient_id, coverage)
+);
+
+CREATE INDEX idx_patient_insurance_payer ON patient_insurance (payer, patient_id);
+
+CREATE TABLE appointments (
+    id INTEGER PRIMARY KEY,
+    patient_id INTEGER NOT NULL REFERENCES patients (id) ON DELETE CASCADE,
+    provider_id TEXT,
+    provider TEXT,
+    date TEXT, -- ISO 8601 date, so lexical order is chronological
+    time TEXT,
+    timezone TEXT,
+    department TEXT,
+    location_name TEXT,
+    location_address TEXT,
+    status TEXT,
+    reason TEXT
+);
+
+-- Serves per-patient history reads and the latest-completed-visit aggregate behind patient_provider_status.
+CREATE INDEX idx_appointments_patient_provider_status_date
+    ON appointments (patient_id, provider_id, status, date);
+
+CREATE TABLE referrals (
+    id INTEGER PRIMARY KEY,
+    patient_id INTEGER NOT NULL REFERENCES patients (id) ON DELETE CASCADE,
+    provider_id TEXT,
+    name TEXT,
+    specialty TEXT,
+    department TEXT,
+    location_name TEXT,
+    location_address TEXT,
+    hours TEXT
+);
+
+CREATE INDEX idx_referrals_patient_provider ON referrals (patient_id, provider_id);
+
+CREATE TABLE referral_candidates (
+    referral_id INTEGER NOT NULL REFERENCES referrals (id) ON DELETE CASCADE,
+    provider_id TEXT,
+    name TEXT
+);
+
+CREATE INDEX idx_referral_candidates_referral ON referral_candidates (referral_id);
+
+-- Derived per (patient, provider) facts for chat enrichment: the latest completed visit and the first
+-- referred department. Rewritten whenever a patient's appointments or referrals are written, and rebuilt
+-- by `flask refresh-provider-status`. NEW/ESTABLISHED is decided at read time from last_completed, so
+-- the rolling 5-year window needs no expiry job.
+CREATE TABLE patient_provider_status (
+    patient_id INTEGER NOT NULL REFERENCES patients (id) ON DELETE CASCADE,
+    provider_id TEXT NOT NULL,
+    last_completed TEXT, -- ISO 8601 date of the latest completed appointment, or NULL
+    referred_department TEXT,
+    PRIMARY KEY (patient_id, provider_id)
+) WITHOUT ROWID;
+
+-- Bumped by every bulk write (init-db, migrate-db, import-patients). Each process compares it on patient
+-- cache lookups and drops its cached records when it changes. Not dropped above, so it only grows.
+CREATE TABLE IF NOT EXISTS patient_data_generation (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    generation INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO patient_data_generation (id, generation) VALUES (1, 0);
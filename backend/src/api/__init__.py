@@ -1,6 +1,5 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
-import logging
 import openai
 
 def create_app(test_config=None):
@@ -16,55 +15,59 @@ def create_app(test_config=None):
         # Load the test config if passed in
         app.config.from_mapping(test_config)
 
-    CORS(app)
+    # The frontend reads the /patients cursor from X-Next-Cursor, which browsers hide unless exposed.
+    CORS(app, expose_headers=['X-Next-Cursor'])
 
-    # Initialize managers within the app context to ensure config is loaded
-    with app.app_context():
-        from core.care_data_manager import CareDataManager
-        from core.vector_data_manager import VectorDataManager
-        from .db import get_db
-        import json
-
-        openai.api_key = app.config['OPENAI_API_KEY']
-        if not openai.api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment variables.")
-
-        def get_patient_data_internal(patient_id):
-            """
-            Internal function to get patient data directly from the database
-            without making an HTTP request. This is used by the CareDataManager.
-            """
-            db = get_db()
-            row = db.execute("SELECT * FROM patients WHERE id = ?", (patient_id,)).fetchone()
-            if not row:
-                return None
-            patient_data = dict(row)
-            patient_data['referred_providers'] = json.loads(patient_data['referred_providers'])
-            patient_data['appointments'] = json.loads(patient_data['appointments'])
-            patient_data['insurance'] = json.loads(patient_data['insurance'])
-            return patient_data
-
-        data_manager = CareDataManager(data_sheet_path=app.config['DATA_SHEET_PATH'], patient_api_base_url=None)
-        data_manager.get_patient_data = get_patient_data_internal
-
-        vector_manager = VectorDataManager(app_config=app.config)
-
-        # Store manager instances in the app config for easy access in routes
-        app.config['DATA_MANAGER'] = data_manager
-        app.config['VECTOR_MANAGER'] = vector_manager
-        logging.info("Data managers initialized.")
+    openai.api_key = app.config['OPENAI_API_KEY']
+    if not openai.api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables.")
 
     # Register database functions (init-db command, close_db)
     from . import db
     db.init_app(app)
 
+    # Register maintenance CLI commands (reindex)
+    from . import cli
+    cli.init_app(app)
+
+    # Register request timing hooks and the /metrics endpoint
+    from . import metrics
+    metrics.init_app(app)
+
+    # Lazily built managers (CareDataManager, VectorDataManager) and warmup
+    from . import services
+
     # Register API routes from the routes module
     from . import routes
     app.register_blueprint(routes.bp)
 
     @app.route('/healthcheck')
     def healthcheck():
-        """A simple health check endpoint to confirm the server is running."""
-        return jsonify({"status": "ok"})
+        """Liveness check: the process is up and serving, even while services warm up."""
+        body = {"status": "ok", "db_pool": db.get_pool(app).stats()}
+        data_manager = services.peek('data_manager', app)
+        if data_manager is not None:
+            body["patient_cache"] = data_manager.patient_data_cache.stats()
+        session_store = services.peek('session_store', app)
+        if session_store is not None:
+            body["sessions"] = session_store.stats()
+        llm_scheduler = services.peek('llm_scheduler', app)
+        if llm_scheduler is not None:
+            body["llm_scheduler"] = llm_scheduler.stats()
+        return jsonify(body)
+
+    @app.route('/readiness')
+    def readiness():
+        """Readiness check: 503 until the managers are built and warmup has finished."""
+        ready, body = services.readiness(app)
+        return jsonify(body), 200 if ready else 503
+
+    # Heavy managers are built lazily. When preloading (e.g. gunicorn --preload) they are built
+    # here, before workers fork, so the index and directory are shared copy-on-write.
+    if app.config['PRELOAD_SERVICES']:
+        services.preload(app)
+    elif app.config['WARMUP_ON_START']:
+        # Started by the first request (usually a probe), so CLI commands never trigger indexing.
+        app.before_request(lambda: services.ensure_warmup_started(app))
 
     return app
\ No newline at end of file
@@ -0,0 +1,20 @@
+import click
+
+from . import services
+
+@click.command('reindex')
+@click.option('--force', is_flag=True, help='Re-upsert every document, not just changed ones.')
+def reindex_command(force):
+    """Flask CLI command to incrementally sync data_sheet.json into the vector DB."""
+    vector_manager = services.get_vector_manager()
+    summary = vector_manager.reindex(force=force)
+    if summary is None:
+        raise click.ClickException('Could not load the hospital data sheet.')
+    click.echo(
+        f"Reindexed {summary['total']} documents: {summary['upserted']} upserted, "
+        f"{summary['deleted']} deleted, {summary['unchanged']} unchanged."
+    )
+
+def init_app(app):
+    """Registers maintenance CLI commands with the Flask application instance."""
+    app.cli.add_command(reindex_command)
@@ -1,42 +1,191 @@
 import sqlite3
 import click
 import os
+import threading
+import time
 from flask import current_app, g
 import db_utils
+import patient_import
+
+class ConnectionPool:
+    """
+    A small pool of long-lived SQLite connections. Reusing connections keeps
+    pragmas applied once and lets sqlite3's per-connection statement cache
+    serve hot queries such as the patient lookup without re-preparing them.
+    Connections beyond `size` are opened on demand and closed on release.
+    """
+    def __init__(self, database_path, size=8, pragmas=None, cached_statements=256):
+        self.database_path = database_path
+        self.size = size
+        self.pragmas = pragmas or {}
+        self.cached_statements = cached_statements
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self.stats_counters = {"created": 0, "acquired": 0, "reused": 0, "overflow_closed": 0, "in_use": 0}
+
+        # Ensure the database directory exists before connecting
+        os.makedirs(os.path.dirname(database_path), exist_ok=True)
+        conn = self._connect()
+        # WAL is a persistent property of the database file, so setting it once is enough.
+        conn.execute("PRAGMA journal_mode=WAL")
+        self._idle.append(conn)
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.database_path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        self.stats_counters["created"] += 1
+        return conn
+
+    def acquire(self):
+        """Returns an idle connection, or opens a new one if none is available."""
+        with self._lock:
+            self._reset_after_fork()
+            self.stats_counters["acquired"] += 1
+            self.stats_counters["in_use"] += 1
+            if self._idle:
+                self.stats_counters["reused"] += 1
+                return self._idle.pop()
+            return self._connect()
+
+    def release(self, conn):
+        """Returns a connection to the pool, rolling back anything left uncommitted."""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self.stats_counters["in_use"] -= 1
+            if os.getpid() == self._pid and len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+            self.stats_counters["overflow_closed"] += 1
+        conn.close()
+
+    def stats(self):
+        """Returns pool counters plus the current number of idle connections."""
+        with self._lock:
+            return dict(self.stats_counters, idle=len(self._idle), size=self.size)
+
+    def _reset_after_fork(self):
+        """SQLite connections must not cross a fork, so a forked worker starts with an empty pool."""
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._idle = []
+            self.stats_counters["in_use"] = 0
+
+def get_pool(app=None):
+    """Returns the application's connection pool, creating it on first use."""
+    app = app or current_app._get_current_object()
+    pool = app.extensions.get('db_pool')
+    if pool is None:
+        pool = ConnectionPool(
+            app.config['DATABASE_PATH'],
+            size=app.config.get('DB_POOL_SIZE', 8),
+            pragmas={
+                "foreign_keys": "ON",
+                "busy_timeout": app.config.get('DB_BUSY_TIMEOUT_MS', 5000),
+                "synchronous": app.config.get('DB_SYNCHRONOUS', 'NORMAL'),
+                "cache_size": app.config.get('DB_CACHE_SIZE', -16000),
+                "mmap_size": app.config.get('DB_MMAP_SIZE', 256 * 1024 * 1024),
+            },
+            cached_statements=app.config.get('DB_CACHED_STATEMENTS', 256)
+        )
+        app.extensions['db_pool'] = pool
+    return pool
 
 def get_db():
     """
     Connects to the application's configured database. The connection
-    is unique for each request and will be reused if called again during
-    the same request.
+    is borrowed from the pool for each request and will be reused if
+    called again during the same request.
     """
     if 'db' not in g:
-        # Ensure the database directory exists before connecting
-        os.makedirs(os.path.dirname(current_app.config['DATABASE_PATH']), exist_ok=True)
-        g.db = sqlite3.connect(
-            current_app.config['DATABASE_PATH'],
-            detect_types=sqlite3.PARSE_DECLTYPES
-        )
-        g.db.row_factory = sqlite3.Row
+        g.db = get_pool().acquire()
 
     return g.db
 
 def close_db(e=None):
-    """Closes the database connection if it was opened for this request."""
+    """Returns the request's database connection to the pool."""
     db = g.pop('db', None)
 
     if db is not None:
-        db.close()
+        get_pool().release(db)
 
 @click.command('init-db')
-def init_db_command():
+@click.option('--keep-existing', is_flag=True, help='Leave an existing database untouched instead of recreating it.')
+def init_db_command(keep_existing):
     """Flask CLI command to clear existing data and create new tables."""
     db = get_db()
+    if keep_existing and db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'patients'").fetchone():
+        if db_utils.ensure_provider_status(db):
+            click.echo('Built the patient provider status table.')
+        click.echo('Database already exists. Keeping existing data.')
+        return
     db_utils.create_tables(db, current_app.config['SCHEMA_PATH'])
     db_utils.seed_data(db, current_app.config['PATIENT_SHEET_PATH'])
+    _invalidate_patient_cache()
     click.echo('Initialized the database.')
 
+@click.command('migrate-db')
+def migrate_db_command():
+    """Flask CLI command to convert a JSON-blob patients table to the normalized schema."""
+    migrated = db_utils.migrate_blob_schema(get_db(), current_app.config['SCHEMA_PATH'])
+    _invalidate_patient_cache()
+    if migrated is None:
+        click.echo('Database already uses the normalized schema.')
+    else:
+        click.echo(f'Migrated {migrated} patients to the normalized schema.')
+
+@click.command('import-patients')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['auto', 'json', 'jsonl']), default='auto',
+              help='JSON array / patient_sheet.json document, or JSON lines. Default: by file extension.')
+@click.option('--mode', type=click.Choice(patient_import.MODES), default='upsert',
+              help='insert: fail on existing ids; upsert: replace existing patients; merge: add to them.')
+@click.option('--chunk-size', type=int, default=5000, show_default=True, help='Patients per transaction.')
+def import_patients_command(path, fmt, mode, chunk_size):
+    """Flask CLI command to stream patients from a file into the database."""
+    def progress(done, rate):
+        click.echo(f'{done} patients imported ({rate:.0f} rows/s)')
+
+    rows, seconds = patient_import.import_patients(
+        get_db(), patient_import.iter_patients(path, fmt), mode=mode, chunk_size=chunk_size, progress=progress
+    )
+    _invalidate_patient_cache()
+    click.echo(f'Imported {rows} patients in {seconds:.1f}s ({rows / seconds if seconds else 0:.0f} rows/s).')
+
+@click.command('refresh-provider-status')
+def refresh_provider_status_command():
+    """Flask CLI command to rebuild the materialized patient provider status, e.g. nightly."""
+    db = get_db()
+    started = time.perf_counter()
+    # A database from before the table existed gets it created and filled in one step.
+    if not db_utils.ensure_provider_status(db):
+        db_utils.refresh_provider_status(db)
+        db.commit()
+    rows = db.execute("SELECT COUNT(*) FROM patient_provider_status").fetchone()[0]
+    click.echo(f'Refreshed {rows} patient provider status rows in {time.perf_counter() - started:.1f}s.')
+
+def _invalidate_patient_cache():
+    """
+    Bumps the patient data generation after a bulk write. The server's
+    workers are separate processes; each sees the new generation on its next
+    patient lookup (within PATIENT_CACHE_GENERATION_CHECK_SECONDS) and drops
+    its cached records. Cached chat answers need no clearing: they are keyed
+    by a fingerprint of the patient record, so changed records never match them.
+    """
+    db_utils.bump_patient_generation(get_db())
+
 def init_app(app):
     """Registers database functions with the Flask application instance."""
     app.teardown_appcontext(close_db)
-    app.cli.add_command(init_db_command)
\ No newline at end of file
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(migrate_db_command)
+    app.cli.add_command(import_patients_command)
+    app.cli.add_command(refresh_provider_status_command)
@@ -0,0 +1,69 @@
+import time
+from flask import Response, current_app, g, request
+
+from core.metrics import REGISTRY, REQUEST_SECONDS, CallbackCollector, current_timings
+
+def _start_timer():
+    g.request_started = time.perf_counter()
+    g.request_timings = {}
+    current_timings.set(g.request_timings)
+
+def _record_request(response):
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    REQUEST_SECONDS.observe(elapsed, endpoint, request.method, str(response.status_code))
+
+    timings = g.pop('request_timings', None)
+    if timings and current_app.config.get('METRICS_RESPONSE_HEADERS'):
+        # Server-Timing shows up in browser dev tools next to the request.
+        response.headers['Server-Timing'] = ", ".join(
+            f"{key[:-3]};dur={value:.2f}" for key, value in timings.items() if key.endswith('_ms')
+        )
+    return response
+
+def _register_collectors(app):
+    """Exposes cache and connection-pool stats, read from the live objects at scrape time."""
+    from . import db, services
+
+    def cache_stats():
+        stats = {}
+        data_manager = services.peek('data_manager', app)
+        if data_manager is not None:
+            stats["patient"] = data_manager.patient_data_cache.stats()
+        vector_manager = services.peek('vector_manager', app)
+        if vector_manager is not None:
+            stats["embedding"] = vector_manager.embedding_cache.stats()
+        speech_cache = services.peek('speech_cache', app)
+        if speech_cache is not None:
+            stats["speech"] = speech_cache.stats()
+        response_cache = services.peek('response_cache', app)
+        if response_cache is not None:
+            stats["response"] = response_cache.stats()
+        return stats
+
+    def counter_values(field):
+        return lambda: {(name,): stats[field] for name, stats in cache_stats().items()}
+
+    REGISTRY.register(CallbackCollector(
+        "care_cache_hits_total", "Cache hits.", ("cache",), counter_values("hits"), "counter"))
+    REGISTRY.register(CallbackCollector(
+        "care_cache_misses_total", "Cache misses.", ("cache",), counter_values("misses"), "counter"))
+    REGISTRY.register(CallbackCollector(
+        "care_cache_hit_ratio", "Cache hit ratio since startup.", ("cache",), counter_values("hit_rate")))
+    REGISTRY.register(CallbackCollector(
+        "care_sqlite_pool", "SQLite connection pool counters and sizes.", ("stat",),
+        lambda: {(name,): value for name, value in db.get_pool(app).stats().items()}))
+
+def metrics_endpoint():
+    """Prometheus scrape endpoint."""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+def init_app(app):
+    """Registers request timing hooks, metric collectors and the /metrics endpoint."""
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    _register_collectors(app)
+    app.add_url_rule('/metrics', 'metrics', metrics_endpoint)
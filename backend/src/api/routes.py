@@ -1,89 +1,88 @@
-from flask import Blueprint, jsonify, request, Response, current_app
+from flask import Blueprint, jsonify, request, Response, current_app, send_file, stream_with_context, url_for
+from werkzeug.exceptions import RequestEntityTooLarge
+from concurrent.futures import as_completed
 import json
 import logging
+import textwrap
+import time
 import openai
 
+import db_utils
+from core.availability import describe_requested_time, parse_requested_time
+from core.context_builder import INTENT_KEYWORDS
+from core.metrics import CHAT_ANSWERS, CONTEXT_BYTES, STAGE_SECONDS, current_timings, record_context_tokens, record_usage, span
+from core.response_cache import ResponseCache
+from . import services
 from .db import get_db
 
 bp = Blueprint('api', __name__, url_prefix='/')
 
 @bp.route('/patients', methods=['GET'])
 def get_all_patients():
-    """API endpoint to return a summary list of all patients."""
+    """
+    API endpoint to return a page of patient summaries, ordered by id.
+
+    Query parameters: `limit` (default PATIENTS_PAGE_SIZE), `after_id` (the
+    cursor from the previous page), `q` (name prefix search), `pcp` and
+    `payer` (exact filters). The next cursor is returned in the
+    `X-Next-Cursor` and `Link` headers. With `format=jsonl` every matching
+    patient is streamed as JSON lines instead.
+    """
+    try:
+        after_id = int(request.args.get('after_id', 0))
+        limit = request.args.get('limit', type=int)
+    except ValueError:
+        return jsonify({"error": "after_id must be an integer"}), 400
+    filters = {
+        "name_query": request.args.get('q'),
+        "pcp": request.args.get('pcp'),
+        "payer": request.args.get('payer')
+    }
     db = get_db()
-    cursor = db.execute("SELECT id, name FROM patients")
-    summaries = [{"id": row["id"], "name": row["name"]} for row in cursor.fetchall()]
-    return jsonify(summaries)
+
+    if request.args.get('format') == 'jsonl':
+        return Response(stream_with_context(_stream_patients(db, after_id, limit, filters)),
+                        mimetype="application/x-ndjson")
+
+    max_page = current_app.config['PATIENTS_MAX_PAGE_SIZE']
+    limit = min(max(limit or current_app.config['PATIENTS_PAGE_SIZE'], 1), max_page)
+    # Fetch one extra row to learn whether another page exists without a COUNT query.
+    rows = db_utils.search_patients(db, after_id=after_id, limit=limit + 1, **filters)
+    summaries = [{"id": row["id"], "name": row["name"]} for row in rows[:limit]]
+    response = jsonify(summaries)
+    if len(rows) > limit:
+        next_cursor = summaries[-1]["id"]
+        args = request.args.to_dict()
+        args['after_id'] = next_cursor
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+        response.headers['Link'] = f'<{url_for("api.get_all_patients", **args)}>; rel="next"'
+    return response
+
+def _stream_patients(db, after_id, limit, filters):
+    """Yields matching patients as JSON lines, reading them in keyset-paginated batches."""
+    batch_size = current_app.config['PATIENTS_EXPORT_BATCH_SIZE']
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = batch_size if remaining is None else min(batch_size, remaining)
+        rows = db_utils.search_patients(db, after_id=after_id, limit=size, **filters)
+        if not rows:
+            return
+        yield "".join(json.dumps({"id": row["id"], "name": row["name"]}) + "\n" for row in rows)
+        after_id = rows[-1]["id"]
+        if remaining is not None:
+            remaining -= len(rows)
 
 @bp.route('/patient/<int:patient_id>', methods=['GET'])
 def get_data(patient_id):
     """API endpoint to return detailed data for a specific patient."""
-    db = get_db()
-    row = db.execute("SELECT * FROM patients WHERE id = ?", (patient_id,)).fetchone()
-    if row:
-        patient_data = dict(row)
-        patient_data['referred_providers'] = json.loads(patient_data['referred_providers'])
-        patient_data['appointments'] = json.loads(patient_data['appointments'])
-        patient_data['insurance'] = json.loads(patient_data['insurance'])
+    patient_data = services.get_data_manager().get_patient_data(patient_id)
+    if patient_data:
         return jsonify(patient_data)
     else:
         return jsonify({"error": "Patient not found"}), 404
 
-@bp.route('/chat', methods=['POST'])
-def chat():
-    """Handles the main chat interaction by performing RAG."""
-    data = request.get_json()
-    user_prompt = data.get('prompt')
-    patient_id = data.get('patient_id')
-
-    if not user_prompt or not patient_id:
-        return jsonify({"error": "prompt and patient_id are required"}), 400
-
-    # Retrieve service managers from the application context
-    vector_manager = current_app.config['VECTOR_MANAGER']
-    data_manager = current_app.config['DATA_MANAGER']
-
-    # RAG Logic 
-    semantic_context = vector_manager.query_relevant_context(user_prompt)
-    patient_data = data_manager.get_patient_data(patient_id)
-
-    if not patient_data:
-        return jsonify({"error": "Patient not found"}), 404
-
-    primary_insurance = patient_data.get('insurance', {}).get('primary', {}).get('payer')
-    if primary_insurance:
-        is_accepted = data_manager.get_insurance_status(primary_insurance)
-        patient_data['insurance']['primary']['is_accepted'] = is_accepted
-
-    for provider in data_manager.get_all_providers():
-        # Dynamically enrich the patient data based on the user's prompt
-        provider_name_parts = provider['name'].replace(',', '').lower().split()
-        if any(part in user_prompt.lower() for part in provider_name_parts if len(part) > 2):
-            is_established = data_manager.check_established_patient(patient_id, provider['name'])
-            status = "ESTABLISHED" if is_established else "NEW"
-            patient_data[f"status_with_{provider['provider_id']}"] = status
-            appointment_rules = data_manager.hospital_data.get("Appointments", {})
-            if status in appointment_rules.get("Types", {}):
-                patient_data[f"rules_for_{provider['provider_id']}"] = {
-                    "duration_minutes": appointment_rules["Types"][status].get("duration_minutes"),
-                    "arrival_instructions": appointment_rules["Arrival"].get(status)
-                }
-            
-            for referral in patient_data.get('referred_providers', []):
-                if referral.get('provider_id') == provider.get('provider_id'):
-                    referred_dept_name = referral.get('department')
-                    for dept in provider.get('departments', []):
-                        if dept.get('name') == referred_dept_name:
-                            patient_data[f"referred_location_for_{provider['provider_id']}"] = dept
-                            break
-
-    combined_context = {
-        "Semantically Relevant Hospital Knowledge": semantic_context,
-        "Full Patient Record": patient_data
-    }
-    context_str = json.dumps(combined_context, indent=2)
-
-    system_prompt = """
+# Kept byte-for-byte identical across requests and sent first, so provider-side prompt caching applies.
+SYSTEM_PROMPT = textwrap.dedent("""
     You are a highly capable Care Coordinator Assistant. Your task is to help a nurse take the correct next steps for the currently selected patient.
     Use the provided context below to answer the nurse's questions accurately and concisely. Be proactive and guiding.
     Format your answers for clarity using Markdown (e.g., bolding for names, lists for steps).
@@ -103,31 +102,549 @@ def chat():
         - 4. If there is a conflict, you **MUST** state the conflict clearly and suggest alternative times. Do not proceed with booking steps.
         - 5. If there is no conflict, you may proceed with the next steps for booking.
         - **If a `referred_location_for_{provider_id}` field exists in the `Full Patient Record`, you MUST use the hours and address from that specific location for scheduling.** This is the most important location.
+        - **If an `availability_for_{provider_id}` field exists, it is the definitive result of comparing the requested day and time with that provider's hours:** `open` tells whether the time is within hours, `open_between` narrows a part of the day such as a morning, and `next_opening` is the earliest alternative. Use it instead of comparing times yourself.
+        - `providers_open_at_requested_time`, when present, lists providers of the asked-about specialty whose hours overlap the requested time. Its `hours_not_checked` lists providers whose hours could not be read automatically; compare the requested time with their `hours` yourself.
     - **Insurance Rejection Flow:** If you determine that an insurance is not accepted, you **MUST** then look for "Self-Pay Rates" in the `Semantically Relevant Hospital Knowledge` context and present those rates to the nurse as the next step.
         - To check if insurance is accepted, look for the `is_accepted` boolean field inside the patient's `insurance` object. This is the definitive truth.
     - **DO NOT** attempt to re-calculate the status or find the rules in the `Semantically Relevant Hospital Knowledge`. The `status_with_...` and `rules_for_...` fields are your **ONLY** source of truth for these details. Ignore any other conflicting information.
+    - In a conversation, a follow-up question only carries context that was not given before; earlier context still applies.
+    - The patient record is pruned to what the question needs: `appointments` lists the most relevant visits newest first, and `appointments_omitted` counts the ones left out.
+    """).strip()
+
+CHAT_MODEL = "gpt-4o-mini"
+
+def _enrich_patient_data(data_manager, patient_id, patient_data, providers, user_prompt):
+    """Adds insurance, NEW/ESTABLISHED status, referral and availability facts for providers mentioned in the prompt."""
+    primary_insurance = (patient_data.get('insurance') or {}).get('primary') or {}
+    if primary_insurance.get('payer'):
+        # Copy before annotating so the shared cached record is left untouched.
+        patient_data['insurance'] = dict(patient_data['insurance'])
+        patient_data['insurance']['primary'] = dict(
+            primary_insurance, is_accepted=data_manager.get_insurance_status(primary_insurance['payer'])
+        )
+
+    # Dynamically enrich the patient data for each provider mentioned in the user's prompt
+    patient_data.update(data_manager.get_provider_facts(patient_id, providers))
+    patient_data.update(_availability_facts(data_manager, patient_id, providers, user_prompt))
+    return patient_data
+
+def _availability_facts(data_manager, patient_id, providers, user_prompt):
+    """
+    Checks the day and time the prompt asks about against the precompiled
+    provider hours: for each provider, at the referred location if there is
+    one (the first referral's department, as in the provider status), or else the open providers of a specialty named in the prompt.
+    Returns no facts when the prompt names no day. Hours that cannot be
+    parsed get no precomputed answer; the model reads them as written.
+    """
+    requested = parse_requested_time(user_prompt)
+    if requested is None:
+        return {}
+    facts = {}
+    statuses = data_manager.get_provider_statuses(patient_id, [p['provider_id'] for p in providers]) if providers else {}
+    for provider in providers:
+        referred = (statuses.get(provider['provider_id']) or {}).get('referred_department')
+        if not any(dept.get('name') == referred for dept in provider.get('departments', [])):
+            referred = None
+        availability = data_manager.check_provider_availability(provider['provider_id'], requested, referred)
+        if availability is not None:
+            facts[f"availability_for_{provider['provider_id']}"] = availability
+    if not providers:
+        specialty = data_manager.find_mentioned_specialty(user_prompt)
+        if specialty:
+            facts["providers_open_at_requested_time"] = {
+                "specialty": specialty,
+                "requested": describe_requested_time(requested),
+                "providers": data_manager.find_open_providers(requested, specialty)
+            }
+            unchecked = data_manager.find_unparsed_hours(specialty)
+            if unchecked:
+                facts["providers_open_at_requested_time"]["hours_not_checked"] = unchecked
+    return facts
+
+def _build_chat_messages(user_prompt, patient_id):
+    """
+    Runs retrieval and enrichment for a chat request and returns the LLM
+    messages with the response cache scope of their context, or (None, None)
+    if the patient does not exist. Stage durations are recorded into the
+    request's timings via metrics spans.
+    """
+    vector_manager = services.get_vector_manager()
+    data_manager = services.get_data_manager()
+
+    # RAG Logic 
+    with span("retrieval"):
+        documents = vector_manager.query_relevant_documents(user_prompt)
+
+    with span("patient_fetch"):
+        patient_data = data_manager.get_patient_data(patient_id)
+    if not patient_data:
+        return None, None
+
+    messages, scope, _ = _assemble_chat_messages(data_manager, user_prompt, patient_id, documents, patient_data)
+    return messages, scope
+
+def _assemble_chat_messages(data_manager, user_prompt, patient_id, documents, patient_data, providers=None):
+    """
+    Enriches a fetched patient record, builds the context from it and the
+    retrieved documents, and returns (LLM messages, response cache scope,
+    context report). `providers` skips mention matching when already known.
+    """
+    with span("enrichment"):
+        if providers is None:
+            providers = data_manager.find_mentioned_providers(user_prompt, patient_data.get('name'))
+        patient_data = _enrich_patient_data(data_manager, patient_id, patient_data, providers, user_prompt)
+    with span("serialize"):
+        context_str, report = services.get_context_builder().build(
+            user_prompt, documents, patient_data, [p['provider_id'] for p in providers]
+        )
+    CONTEXT_BYTES.observe(len(context_str.encode('utf-8')))
+    record_context_tokens(report)
+
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        _user_message(context_str, user_prompt)
+    ]
+    return messages, ResponseCache.make_scope(patient_id, context_str), report
+
+def _complete_chat(messages, client=openai):
+    """Calls the chat model once, with the module-level client by default, and returns the answer text."""
+    with span("llm"):
+        response = client.chat.completions.create(model=CHAT_MODEL, messages=messages)
+    record_usage(response.usage)
+    return response.choices[0].message.content
+
+def _user_message(context_str, user_prompt):
+    if context_str is None:
+        return {"role": "user", "content": f"Question:\n{user_prompt}"}
+    return {"role": "user", "content": f"Context:\n{context_str}\n\nQuestion:\n{user_prompt}"}
+
+def _get_cached_answer(user_prompt, scope):
+    """
+    Looks the prompt up in the response cache. Returns (answer or None, the
+    prompt's embedding when similarity matching is on, to store alongside a new answer).
+    """
+    response_cache = services.get_response_cache()
+    if response_cache is None:
+        return None, None
+    prompt_vector = None
+    if response_cache.similarity_threshold is not None:
+        # Already embedded during retrieval, so this is an embedding cache hit.
+        prompt_vector = services.get_vector_manager().embed_texts([user_prompt])[0]
+    with span("response_cache"):
+        return response_cache.get(scope, user_prompt, prompt_vector), prompt_vector
+
+def _store_answer(user_prompt, scope, answer, prompt_vector):
+    response_cache = services.get_response_cache()
+    if response_cache is not None and answer:
+        response_cache.put(scope, user_prompt, answer, prompt_vector)
+
+def _fast_path_answer(user_prompt, patient_id):
+    """Returns the router's templated answer for a narrow factual question, or None."""
+    router = services.get_intent_router()
+    if router is None:
+        return None
+    with span("fast_path"):
+        return router.route(user_prompt, patient_id)
+
+def _chat_response(body, path):
+    """Wraps a chat answer, recording and reporting which path produced it."""
+    CHAT_ANSWERS.inc(path)
+    response = jsonify(dict(body, path=path))
+    response.headers['X-Chat-Path'] = path
+    return response
+
+def _context_report():
+    """Returns the current request's context token counts, for the chat response body."""
+    timings = current_timings.get() or {}
+    return {key: timings[key] for key in ("context_tokens", "context_tokens_saved") if key in timings}
+
+def _sse_event(event, payload):
+    """Formats a single Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@bp.route('/chat', methods=['POST'])
+def chat():
+    """
+    Handles the main chat interaction. Narrow factual questions are answered
+    by the intent router without the LLM; everything else goes through RAG.
+    The response's `path` is "fast", "cache" or "rag".
+    """
+    if request.args.get('stream') in ('1', 'true'):
+        return chat_stream()
+
+    data = request.get_json()
+    user_prompt = data.get('prompt')
+    patient_id = data.get('patient_id')
+
+    if not user_prompt or not patient_id:
+        return jsonify({"error": "prompt and patient_id are required"}), 400
+
+    fast_answer = _fast_path_answer(user_prompt, patient_id)
+    if fast_answer is not None:
+        return _chat_response({"response": fast_answer["response"], "intent": fast_answer["intent"], "cached": False}, "fast")
+
+    messages, scope = _build_chat_messages(user_prompt, patient_id)
+    if messages is None:
+        return jsonify({"error": "Patient not found"}), 404
+
+    answer, prompt_vector = _get_cached_answer(user_prompt, scope)
+    if answer is not None:
+        return _chat_response({"response": answer, "cached": True, **_context_report()}, "cache")
+
+    answer = _complete_chat(messages)
+    _store_answer(user_prompt, scope, answer, prompt_vector)
+    return _chat_response({"response": answer, "cached": False, **_context_report()}, "rag")
+
+@bp.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Streaming variant of /chat. Emits a `context` event once retrieval and
+    enrichment are done, a `token` event per model delta, and a final `done`
+    event carrying per-stage timings, the `cached` flag and the `path` (or an
+    `error` event on failure). A fast-path or cached answer arrives as a single
+    `token` event.
+    """
+    data = request.get_json()
+    user_prompt = data.get('prompt')
+    patient_id = data.get('patient_id')
+
+    if not user_prompt or not patient_id:
+        return jsonify({"error": "prompt and patient_id are required"}), 400
+
+    request_started = time.perf_counter()
+    timings = current_timings.get()
+    if timings is None:
+        timings = {}
+        current_timings.set(timings)
+    fast_answer = _fast_path_answer(user_prompt, patient_id)
+    if fast_answer is not None:
+        messages, scope, prompt_vector = None, None, None
+        ready_answer, path = fast_answer["response"], "fast"
+    else:
+        # Retrieval runs before the response starts so a missing patient is still a plain 404.
+        messages, scope = _build_chat_messages(user_prompt, patient_id)
+        if messages is None:
+            return jsonify({"error": "Patient not found"}), 404
+        ready_answer, prompt_vector = _get_cached_answer(user_prompt, scope)
+        path = "cache" if ready_answer is not None else "rag"
+
+    def generate():
+        # The generator may run outside the view's context, so re-attach this request's timings.
+        current_timings.set(timings)
+        yield _sse_event("context", {"status": "ready", "timings": dict(timings)})
+        if ready_answer is not None:
+            CHAT_ANSWERS.inc(path)
+            yield _sse_event("token", {"content": ready_answer})
+            timings['total_ms'] = (time.perf_counter() - request_started) * 1000
+            yield _sse_event("done", {"timings": timings, "cached": path == "cache", "path": path})
+            return
+
+        upstream = None
+        parts = []
+        completed = False
+        try:
+            started = time.perf_counter()
+            upstream = openai.chat.completions.create(
+                model=CHAT_MODEL, messages=messages, stream=True, stream_options={"include_usage": True}
+            )
+            for chunk in upstream:
+                if getattr(chunk, 'usage', None):
+                    record_usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if 'first_token_ms' not in timings:
+                    timings['first_token_ms'] = (time.perf_counter() - started) * 1000
+                parts.append(delta)
+                yield _sse_event("token", {"content": delta})
+            timings['generation_ms'] = (time.perf_counter() - started) * 1000
+            STAGE_SECONDS.observe(timings['generation_ms'] / 1000, "llm_stream")
+            timings['total_ms'] = (time.perf_counter() - request_started) * 1000
+            completed = True
+            CHAT_ANSWERS.inc(path)
+            _store_answer(user_prompt, scope, "".join(parts), prompt_vector)
+            yield _sse_event("done", {"timings": timings, "cached": False, "path": path})
+        except GeneratorExit:
+            # The client went away; stop pulling tokens from the model.
+            logging.info(f"Chat stream for patient {patient_id} closed by client.")
+            raise
+        except Exception as e:
+            logging.error(f"Error during streamed chat completion: {e}")
+            yield _sse_event("error", {"error": "Failed to generate response"})
+        finally:
+            if upstream is not None and not completed:
+                upstream.close()
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Chat-Path": path}
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers=headers)
+
+def _prepare_batch(items):
+    """
+    Resolves a batch of (patient_id, prompt) items in bulk: one cached
+    multi-patient fetch, fast-path and response-cache answers, one batched
+    retrieval for the distinct remaining prompts, and mention matching shared
+    across identical prompts. Returns (ready results by item index, {index:
+    (messages, scope, prompt_vector, report)} for items that need the LLM).
     """
+    data_manager = services.get_data_manager()
+    with span("patient_fetch"):
+        patients = data_manager.get_many_patient_data([item['patient_id'] for item in items])
 
-    response = openai.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": f"Context:\n{context_str}\n\nQuestion:\n{user_prompt}"}
-        ]
-    )
-    return jsonify({"response": response.choices[0].message.content})
+    ready = {}
+    pending = []
+    for index, item in enumerate(items):
+        if patients.get(item['patient_id']) is None:
+            ready[index] = {"error": "Patient not found"}
+            continue
+        fast_answer = _fast_path_answer(item['prompt'], item['patient_id'])
+        if fast_answer is not None:
+            ready[index] = {"response": fast_answer["response"], "intent": fast_answer["intent"],
+                            "cached": False, "path": "fast"}
+        else:
+            pending.append(index)
+
+    prompts = list(dict.fromkeys(items[index]['prompt'] for index in pending))
+    with span("retrieval"):
+        documents = dict(zip(prompts, services.get_vector_manager().query_relevant_documents_many(prompts)))
+    with span("enrichment"):
+        # Shared by items with the same prompt and patient name, since the patient's name is never a provider mention.
+        mentions = {(items[index]['prompt'], patients[items[index]['patient_id']].get('name')) for index in pending}
+        providers = {key: data_manager.find_mentioned_providers(*key) for key in mentions}
+
+    llm_jobs = {}
+    for index in pending:
+        prompt, patient_id = items[index]['prompt'], items[index]['patient_id']
+        # Enrichment adds keys to the record, so each item gets its own copy of a patient listed twice.
+        messages, scope, report = _assemble_chat_messages(
+            data_manager, prompt, patient_id, documents[prompt], dict(patients[patient_id]),
+            providers[(prompt, patients[patient_id].get('name'))]
+        )
+        answer, prompt_vector = _get_cached_answer(prompt, scope)
+        if answer is not None:
+            ready[index] = {"response": answer, "cached": True, "path": "cache", "context_tokens": report["tokens"]}
+        else:
+            llm_jobs[index] = (messages, scope, prompt_vector, report)
+    return ready, llm_jobs
+
+@bp.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    """
+    Pre-briefs a worklist. Takes {"items": [{"patient_id": 1, "prompt": "..."}]}
+    and streams one `result` Server-Sent Event per item as soon as it is
+    answered (`index`, `patient_id`, `path` and `response`, or `error`), then
+    a `done` event with counts and timings. Retrieval and enrichment run in
+    bulk and LLM calls fan out through the shared scheduler, so wall time
+    follows CHAT_BATCH_CONCURRENCY rather than the list length.
+    """
+    data = request.get_json() or {}
+    items = data.get('items')
+    max_items = current_app.config['CHAT_BATCH_MAX_ITEMS']
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "items must be a non-empty list of {patient_id, prompt}"}), 400
+    if len(items) > max_items:
+        return jsonify({"error": f"at most {max_items} items per batch"}), 400
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get('prompt') or not isinstance(item.get('patient_id'), (int, str)) \
+                or not item['patient_id']:
+            return jsonify({"error": f"item {index}: prompt and patient_id are required"}), 400
+
+    request_started = time.perf_counter()
+    timings = current_timings.get()
+    if timings is None:
+        timings = {}
+        current_timings.set(timings)
+    ready, llm_jobs = _prepare_batch(items)
+    scheduler = services.get_llm_scheduler()
+
+    def generate():
+        current_timings.set(timings)
+        paths = {}
+
+        def result(index, body):
+            if "path" in body:
+                CHAT_ANSWERS.inc(body["path"])
+                paths[body["path"]] = paths.get(body["path"], 0) + 1
+            else:
+                paths["error"] = paths.get("error", 0) + 1
+            return _sse_event("result", dict(body, index=index, patient_id=items[index]['patient_id']))
+
+        futures = {scheduler.submit(_complete_chat, job[0], scheduler.client or openai): index for index, job in llm_jobs.items()}
+        try:
+            for index in sorted(ready):
+                yield result(index, ready[index])
+            for future in as_completed(futures):
+                index = futures[future]
+                _, scope, prompt_vector, report = llm_jobs[index]
+                try:
+                    answer = future.result()
+                except Exception as e:
+                    logging.error(f"Batch chat completion for item {index} failed: {e}")
+                    yield result(index, {"error": "Failed to generate response"})
+                    continue
+                _store_answer(items[index]['prompt'], scope, answer, prompt_vector)
+                yield result(index, {"response": answer, "cached": False, "path": "rag",
+                                     "context_tokens": report["tokens"]})
+            timings['total_ms'] = (time.perf_counter() - request_started) * 1000
+            yield _sse_event("done", {"count": len(items), "paths": paths, "timings": timings})
+        finally:
+            # If the client went away, drop the calls that have not started yet.
+            for future in futures:
+                future.cancel()
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers=headers)
+
+@bp.route('/sessions', methods=['POST'])
+def create_session():
+    """Starts a conversation about one patient. Follow-ups reuse the context resolved so far."""
+    data = request.get_json() or {}
+    patient_id = data.get('patient_id')
+    if not patient_id:
+        return jsonify({"error": "patient_id is required"}), 400
+    if services.get_data_manager().get_patient_data(patient_id) is None:
+        return jsonify({"error": "Patient not found"}), 404
+    session = services.get_session_store().create(patient_id)
+    return jsonify({"session_id": session["id"], "patient_id": patient_id}), 201
+
+@bp.route('/sessions/<session_id>', methods=['GET'])
+def get_session(session_id):
+    """Returns a session's questions and answers."""
+    session = services.get_session_store().get(session_id)
+    if session is None:
+        return jsonify({"error": "Session not found or expired"}), 404
+    return jsonify({
+        "session_id": session["id"],
+        "patient_id": session["patient_id"],
+        "turns": [{"prompt": turn["prompt"], "response": turn["answer"]} for turn in session["turns"]]
+    })
+
+@bp.route('/sessions/<session_id>', methods=['DELETE'])
+def delete_session(session_id):
+    """Ends a session."""
+    if not services.get_session_store().delete(session_id):
+        return jsonify({"error": "Session not found or expired"}), 404
+    return "", 204
+
+@bp.route('/sessions/<session_id>/messages', methods=['POST'])
+def append_session_message(session_id):
+    """Asks a question within a session. The response reports how much resolved context was reused."""
+    data = request.get_json() or {}
+    user_prompt = data.get('prompt')
+    if not user_prompt:
+        return jsonify({"error": "prompt is required"}), 400
+
+    session_store = services.get_session_store()
+    session = session_store.get(session_id)
+    if session is None:
+        return jsonify({"error": "Session not found or expired"}), 404
+
+    turn, messages, reused = _build_session_turn(session, user_prompt)
+    if turn is None:
+        return jsonify({"error": "Patient not found"}), 404
+
+    with span("llm"):
+        response = openai.chat.completions.create(model=CHAT_MODEL, messages=messages)
+    record_usage(response.usage)
+    turn["answer"] = response.choices[0].message.content
+    session["turns"].append(turn)
+    session_store.save(session)
+    return jsonify({
+        "response": turn["answer"],
+        "session_id": session["id"],
+        "turn": len(session["turns"]),
+        "reused": reused,
+        **_context_report()
+    })
+
+def _build_session_turn(session, user_prompt):
+    """
+    Prepares the next turn of a session. The first turn carries the patient
+    record; later turns only add documents and provider facts the session has
+    not given the model yet. Returns (turn, LLM messages, reuse counts), or
+    (None, None, None) if the patient no longer exists.
+    """
+    vector_manager = services.get_vector_manager()
+    data_manager = services.get_data_manager()
+    session_store = services.get_session_store()
+    patient_id = session["patient_id"]
+
+    with span("retrieval"):
+        documents = vector_manager.query_relevant_documents(user_prompt)
+    with span("patient_fetch"):
+        patient_data = data_manager.get_patient_data(patient_id)
+    if not patient_data:
+        return None, None, None
+    providers = data_manager.find_mentioned_providers(user_prompt, patient_data.get('name'))
+    sent_documents = session_store.sent_documents(session)
+    resolved_providers = session_store.resolved_providers(session)
+    new_documents = [d for d in documents if d not in sent_documents]
+    new_providers = [p for p in providers if p['provider_id'] not in resolved_providers]
+    reused = {"documents": len(documents) - len(new_documents), "providers": len(providers) - len(new_providers)}
+
+    context_str, report = None, {"tokens": 0}
+    if not session["turns"]:
+        with span("enrichment"):
+            patient_data = _enrich_patient_data(data_manager, patient_id, patient_data, new_providers, user_prompt)
+        with span("serialize"):
+            # Later questions may be about anything, so the record is not pruned to this one's intent.
+            context_str, report = services.get_context_builder().build(
+                user_prompt, new_documents, patient_data, intents=INTENT_KEYWORDS
+            )
+        new_documents = new_documents[:report["documents"]]
+    else:
+        facts = {}
+        # Availability depends on the question's day and time, so it is checked on every turn; a follow-up
+        # like "what about Friday?" refers to the providers already discussed.
+        asks_time = parse_requested_time(user_prompt) is not None
+        if new_providers or asks_time:
+            with span("enrichment"):
+                facts.update(data_manager.get_provider_facts(patient_id, new_providers))
+                if asks_time:
+                    discussed = providers or [data_manager.get_provider_by_id(provider_id)
+                                              for provider_id in sorted(resolved_providers)]
+                    facts.update(_availability_facts(data_manager, patient_id, [p for p in discussed if p], user_prompt))
+        with span("serialize"):
+            context_str, report = services.get_context_builder().build_addition(new_documents, facts)
+    if context_str is not None:
+        CONTEXT_BYTES.observe(len(context_str.encode('utf-8')))
+    record_context_tokens(report)
+
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    for previous in session["turns"]:
+        messages.append(_user_message(previous["context"], previous["prompt"]))
+        messages.append({"role": "assistant", "content": previous["answer"]})
+    messages.append(_user_message(context_str, user_prompt))
+
+    turn = {
+        "prompt": user_prompt,
+        "context": context_str,
+        "documents": new_documents,
+        "providers": [p['provider_id'] for p in new_providers]
+    }
+    return turn, messages, reused
 
 @bp.route('/transcribe', methods=['POST'])
 def transcribe_audio():
-    """API endpoint to transcribe an audio file using OpenAI Whisper."""
-    if 'file' not in request.files:
-        return jsonify({"error": "No file part"}), 400
+    """
+    API endpoint to transcribe an audio file using OpenAI Whisper. Uploads
+    over TRANSCRIBE_MAX_UPLOAD_BYTES are rejected with 413; larger parts are
+    spooled to a temporary file by the form parser and streamed to the API
+    from there rather than read into memory.
+    """
+    request.max_content_length = current_app.config['TRANSCRIBE_MAX_UPLOAD_BYTES']
+    try:
+        if 'file' not in request.files:
+            return jsonify({"error": "No file part"}), 400
+    except RequestEntityTooLarge:
+        return jsonify({"error": "Audio file is too large"}), 413
     file = request.files['file']
     if file.filename == '':
         return jsonify({"error": "No selected file"}), 400
-    
+
     try:
-        file_tuple = (file.filename, file.read(), file.mimetype)
+        file_tuple = (file.filename, file.stream, file.mimetype)
         transcript = openai.audio.transcriptions.create(model="whisper-1", file=file_tuple)
         return jsonify({"text": transcript.text})
     except Exception as e:
@@ -136,20 +653,43 @@ def transcribe_audio():
 
 @bp.route('/synthesize-speech', methods=['POST'])
 def synthesize_speech():
-    """API endpoint to synthesize text to speech and stream the audio back."""
-    data = request.get_json()
-    text_to_speak = data.get('text')
+    """
+    API endpoint to synthesize text to speech. Audio is cached on disk by
+    (model, voice, text), so repeated text is served without calling TTS.
+    The text is only accepted in the JSON body, never in the URL, since it may
+    contain PHI; the cached audio is then served by GET /speech/<key>.
+    """
+    text_to_speak = (request.get_json() or {}).get('text')
 
     if not text_to_speak:
         return jsonify({"error": "text is required"}), 400
 
+    model = current_app.config['TTS_MODEL']
+    voice = current_app.config['TTS_VOICE']
+    speech_cache = services.get_speech_cache()
+    key = speech_cache.make_key(model, voice, text_to_speak)
+
+    def synthesize():
+        with span("tts"):
+            response = openai.audio.speech.create(model=model, voice=voice, input=text_to_speak)
+        return response.iter_bytes()
+
     try:
-        response = openai.audio.speech.create(
-            model="tts-1",
-            voice="alloy",
-            input=text_to_speak
-        )
-        return Response(response.iter_bytes(), mimetype="audio/mpeg")
+        path = speech_cache.get_or_create(key, synthesize)
     except Exception as e:
         logging.error(f"Error during speech synthesis: {e}")
-        return jsonify({"error": "Failed to synthesize speech"}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to synthesize speech"}), 500
+    return _send_speech(path, key)
+
+@bp.route('/speech/<key>', methods=['GET'])
+def get_speech(key):
+    """Serves previously synthesized audio by its key (the ETag), with Range support."""
+    path = services.get_speech_cache().lookup(key) if len(key) == 64 and key.isalnum() else None
+    if path is None:
+        return jsonify({"error": "Audio not found"}), 404
+    return _send_speech(path, key)
+
+def _send_speech(path, key):
+    response = send_file(path, mimetype="audio/mpeg", etag=key, conditional=True, max_age=86400)
+    response.headers['Content-Location'] = url_for('api.get_speech', key=key)
+    return response
\ No newline at end of file
@@ -0,0 +1,239 @@
+import logging
+import multiprocessing
+import os
+import threading
+from flask import current_app
+
+import db_utils
+
+_build_lock = threading.RLock()
+
+def _build_data_manager(app):
+    from core.care_data_manager import CareDataManager
+    from .db import get_db
+
+    def get_patient_data_internal(patient_id):
+        """
+        Internal function to get patient data directly from the database
+        without making an HTTP request. This is used by the CareDataManager.
+        """
+        return db_utils.fetch_patient(get_db(), patient_id)
+
+    def get_many_patient_data_internal(patient_ids):
+        """Loads several patients with one IN query per table, for batch requests."""
+        return db_utils.fetch_patients(get_db(), patient_ids)
+
+    def fetch_data_generation_internal():
+        """Reads the generation row that bulk writes bump, so other processes' writes clear the cache."""
+        return db_utils.fetch_patient_generation(get_db())
+
+    def get_provider_statuses_internal(patient_id, provider_ids):
+        """Reads the materialized provider status rows with one primary-key query instead of a record scan."""
+        return db_utils.fetch_provider_status(get_db(), patient_id, provider_ids)
+
+    data_manager = CareDataManager(
+        data_sheet_path=app.config['DATA_SHEET_PATH'],
+        patient_api_base_url=None,
+        patient_cache_size=app.config['PATIENT_CACHE_MAX_ENTRIES'],
+        patient_cache_ttl=app.config['PATIENT_CACHE_TTL_SECONDS'],
+        patient_cache_generation_check=app.config['PATIENT_CACHE_GENERATION_CHECK_SECONDS']
+    )
+    # Cache misses load straight from the database; get_patient_data stays the cached read path.
+    data_manager.fetch_patient_data = get_patient_data_internal
+    data_manager.fetch_many_patient_data = get_many_patient_data_internal
+    data_manager.get_provider_statuses = get_provider_statuses_internal
+    data_manager.fetch_data_generation = fetch_data_generation_internal
+    return data_manager
+
+def _build_vector_manager(app):
+    from core.vector_data_manager import VectorDataManager
+    # Skip the sync when a preload process already brought the index up to date.
+    return VectorDataManager(app_config=app.config, sync_index=not app.extensions.get('vector_index_synced'))
+
+def _build_response_cache(app):
+    from core.response_cache import ResponseCache
+    return ResponseCache(
+        max_entries=app.config['RESPONSE_CACHE_MAX_ENTRIES'],
+        ttl_seconds=app.config['RESPONSE_CACHE_TTL_SECONDS'],
+        similarity_threshold=app.config['RESPONSE_CACHE_SIMILARITY_THRESHOLD']
+    )
+
+def _build_context_builder(app):
+    from core.context_builder import ContextBuilder, TokenCounter
+    return ContextBuilder(
+        token_budget=app.config['CONTEXT_TOKEN_BUDGET'],
+        max_appointments=app.config['CONTEXT_MAX_APPOINTMENTS'],
+        max_history_appointments=app.config['CONTEXT_MAX_HISTORY_APPOINTMENTS'],
+        report_savings=app.config['CONTEXT_REPORT_SAVINGS'],
+        token_counter=TokenCounter(app.config['CONTEXT_TOKENIZER'])
+    )
+
+def _build_session_store(app):
+    from core.session_store import SessionStore
+    return SessionStore(
+        db_path=app.config['SESSION_STORE_PATH'] or os.path.join(os.path.dirname(app.config['DATABASE_PATH']), 'sessions.sqlite3'),
+        max_bytes=app.config['SESSION_MAX_BYTES'],
+        max_session_bytes=app.config['SESSION_MAX_SESSION_BYTES'],
+        max_turns=app.config['SESSION_MAX_TURNS'],
+        idle_seconds=app.config['SESSION_IDLE_SECONDS']
+    )
+
+def _build_speech_cache(app):
+    from core.speech_cache import SpeechCache
+    return SpeechCache(
+        directory=app.config['SPEECH_CACHE_PATH'] or os.path.join(os.path.dirname(app.config['DATABASE_PATH']), 'speech_cache'),
+        max_bytes=app.config['SPEECH_CACHE_MAX_BYTES']
+    )
+
+def _build_intent_router(app):
+    from core.intent_router import IntentRouter
+    return IntentRouter(get_data_manager(app))
+
+def _build_llm_scheduler(app):
+    import openai
+    from core.llm_scheduler import LLMScheduler
+    return LLMScheduler(
+        max_concurrency=app.config['CHAT_BATCH_CONCURRENCY'],
+        max_retries=app.config['CHAT_BATCH_MAX_RETRIES'],
+        # The scheduler backs off and retries itself; SDK retries underneath would multiply them.
+        client=openai.OpenAI(api_key=app.config['OPENAI_API_KEY'], max_retries=0)
+    )
+
+_BUILDERS = {
+    'data_manager': _build_data_manager,
+    'vector_manager': _build_vector_manager,
+    'response_cache': _build_response_cache,
+    'context_builder': _build_context_builder,
+    'session_store': _build_session_store,
+    'speech_cache': _build_speech_cache,
+    'intent_router': _build_intent_router,
+    'llm_scheduler': _build_llm_scheduler,
+}
+
+def _get(name, app=None):
+    """Returns a service, building it on first use. Concurrent first callers wait for one build."""
+    app = app or current_app._get_current_object()
+    service = app.extensions.get(name)
+    if service is None:
+        with _build_lock:
+            service = app.extensions.get(name)
+            if service is None:
+                service = app.extensions[name] = _BUILDERS[name](app)
+                logging.info(f"Initialized {name}.")
+    return service
+
+def get_data_manager(app=None):
+    """Returns the application's CareDataManager, building it on first use."""
+    return _get('data_manager', app)
+
+def get_vector_manager(app=None):
+    """Returns the application's VectorDataManager, building (and syncing the index) on first use."""
+    return _get('vector_manager', app)
+
+def get_context_builder(app=None):
+    """Returns the chat context builder, loading its tokenizer on first use."""
+    return _get('context_builder', app)
+
+def get_session_store(app=None):
+    """Returns the conversation session store, opening it on first use."""
+    return _get('session_store', app)
+
+def get_speech_cache(app=None):
+    """Returns the on-disk cache of synthesized speech."""
+    return _get('speech_cache', app)
+
+def get_llm_scheduler(app=None):
+    """Returns the process-wide scheduler for concurrent LLM calls, starting its threads on first use."""
+    return _get('llm_scheduler', app)
+
+def get_intent_router(app=None):
+    """Returns the fast-path intent router, or None if FAST_PATH_ENABLED is off."""
+    app = app or current_app._get_current_object()
+    if not app.config['FAST_PATH_ENABLED']:
+        return None
+    return _get('intent_router', app)
+
+def get_response_cache(app=None):
+    """Returns the chat answer cache, or None if RESPONSE_CACHE_ENABLED is off."""
+    app = app or current_app._get_current_object()
+    if not app.config['RESPONSE_CACHE_ENABLED']:
+        return None
+    return _get('response_cache', app)
+
+def peek(name, app=None):
+    """Returns a service only if it has already been built, e.g. to invalidate its caches."""
+    app = app or current_app._get_current_object()
+    return app.extensions.get(name)
+
+def warmup(app):
+    """
+    Builds the managers and the context builder and pre-embeds WARMUP_QUERIES so the first real
+    requests hit warm caches, then marks the application ready.
+    """
+    try:
+        get_data_manager(app)
+        get_intent_router(app)
+        get_context_builder(app)
+        vector_manager = get_vector_manager(app)
+        queries = app.config.get('WARMUP_QUERIES') or []
+        if queries:
+            vector_manager.embed_texts(queries)
+            logging.info(f"Pre-embedded {len(queries)} warmup queries.")
+        app.extensions['services_ready'] = True
+    except Exception as e:
+        app.extensions['services_error'] = str(e)
+        logging.error(f"Service warmup failed: {e}")
+
+def _sync_vector_index(app_config):
+    """Entry point of the spawned index-sync process used by preload()."""
+    import openai
+    from core.vector_data_manager import VectorDataManager
+    openai.api_key = app_config['OPENAI_API_KEY']
+    vector_manager = VectorDataManager(app_config=app_config)
+    # The embedding cache's disk tier is shared, so workers start with these warm too.
+    vector_manager.embed_texts(app_config.get('WARMUP_QUERIES') or [])
+
+def preload(app):
+    """
+    Warms services in a process that is about to fork workers (gunicorn --preload).
+    Chroma's native client does not survive a fork, so with that backend the index is
+    synced in a separate spawned process and each worker opens the store on first use.
+    """
+    if app.config.get('VECTOR_BACKEND', 'chroma') != 'chroma':
+        warmup(app)
+        return
+    try:
+        get_data_manager(app)
+        get_intent_router(app)
+        get_context_builder(app)
+        process = multiprocessing.get_context('spawn').Process(
+            target=_sync_vector_index, args=(dict(app.config),), name="vector-index-sync"
+        )
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError(f"vector index sync exited with code {process.exitcode}")
+        app.extensions['vector_index_synced'] = True
+        app.extensions['services_ready'] = True
+    except Exception as e:
+        app.extensions['services_error'] = str(e)
+        logging.error(f"Service preload failed: {e}")
+
+def ensure_warmup_started(app):
+    """Runs warmup once per process in a daemon thread, so liveness checks are answered immediately."""
+    if app.extensions.get('services_warmup_pid') == os.getpid():
+        return
+    with _build_lock:
+        if app.extensions.get('services_warmup_pid') == os.getpid():
+            return
+        app.extensions['services_warmup_pid'] = os.getpid()
+    threading.Thread(target=warmup, args=(app,), name="service-warmup", daemon=True).start()
+
+def readiness(app):
+    """Returns (is_ready, details) for the readiness endpoint."""
+    if app.extensions.get('services_ready'):
+        return True, {"status": "ready"}
+    error = app.extensions.get('services_error')
+    if error:
+        return False, {"status": "error", "error": error}
+    return False, {"status": "warming_up"}
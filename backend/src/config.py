@@ -12,7 +12,85 @@ class Config:
     SCHEMA_PATH = '/app/schema.sql'
     PATIENT_SHEET_PATH = '/app/patient_sheet.json'
 
+    # SQLite Configurations
+    DB_POOL_SIZE = 8
+    DB_BUSY_TIMEOUT_MS = 5000
+    DB_SYNCHRONOUS = 'NORMAL'  # Safe with WAL; use 'FULL' for durability on power loss
+    DB_CACHE_SIZE = -16000  # Negative values are KiB
+    DB_MMAP_SIZE = 256 * 1024 * 1024
+    DB_CACHED_STATEMENTS = 256
+
+    # GET /patients paging
+    PATIENTS_PAGE_SIZE = 100
+    PATIENTS_MAX_PAGE_SIZE = 1000
+    PATIENTS_EXPORT_BATCH_SIZE = 1000
+
+    # Patient record cache shared by /patient/<id> and /chat
+    PATIENT_CACHE_MAX_ENTRIES = 1024
+    PATIENT_CACHE_TTL_SECONDS = 60
+    # How often each process checks whether another one (e.g. `flask import-patients`) bulk-wrote patients
+    PATIENT_CACHE_GENERATION_CHECK_SECONDS = 1.0
+
+    # Answer narrow factual questions from in-memory data without retrieval or the LLM
+    FAST_PATH_ENABLED = os.getenv('FAST_PATH_ENABLED', '1').lower() in ('1', 'true')
+
+    # Chat answer cache, keyed by the context fingerprint and the normalized prompt
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', '1').lower() in ('1', 'true')
+    RESPONSE_CACHE_MAX_ENTRIES = 2048
+    RESPONSE_CACHE_TTL_SECONDS = 3600
+    # Cosine similarity above which a differently worded prompt reuses an answer; None means exact match only.
+    RESPONSE_CACHE_SIMILARITY_THRESHOLD = None
+
+    # Chat context: pruned to the question's intent and serialized compactly within a token budget
+    CONTEXT_TOKEN_BUDGET = 2000
+    CONTEXT_MAX_APPOINTMENTS = 5
+    CONTEXT_MAX_HISTORY_APPOINTMENTS = 20  # when the question is about visit history
+    CONTEXT_TOKENIZER = 'o200k_base'  # tiktoken encoding; token counts are estimated if it cannot be loaded
+    CONTEXT_REPORT_SAVINGS = True  # also count the unpruned context, to report tokens saved
+
+    # POST /chat/batch: worklist pre-briefing with LLM calls spread over a bounded, shared thread pool
+    CHAT_BATCH_MAX_ITEMS = 200
+    CHAT_BATCH_CONCURRENCY = int(os.getenv('CHAT_BATCH_CONCURRENCY', '8'))  # LLM calls in flight per process
+    CHAT_BATCH_MAX_RETRIES = 4  # for rate limits, timeouts and 5xx, with exponential backoff
+
+    # Conversation sessions (stored next to the patient database unless a path is given)
+    SESSION_STORE_PATH = None
+    SESSION_MAX_BYTES = 64 * 1024 * 1024  # all sessions; least recently used ones are evicted beyond this
+    SESSION_MAX_SESSION_BYTES = 256 * 1024  # per session; oldest follow-ups are dropped beyond this
+    SESSION_MAX_TURNS = 20
+    SESSION_IDLE_SECONDS = 1800
+
+    # Audio
+    TRANSCRIBE_MAX_UPLOAD_BYTES = 25 * 1024 * 1024  # Whisper's own limit
+    TTS_MODEL = "tts-1"
+    TTS_VOICE = "alloy"
+    SPEECH_CACHE_PATH = None  # defaults to a directory next to the patient database
+    SPEECH_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+    # Startup
+    # Build managers and warm caches inside create_app (set by gunicorn.conf.py so it happens before fork).
+    PRELOAD_SERVICES = os.getenv('PRELOAD_SERVICES', '').lower() in ('1', 'true')
+    # Otherwise warm up in a background thread after startup; /readiness reports when it is done.
+    WARMUP_ON_START = True
+    WARMUP_QUERIES = [
+        "What are the provider's hours?",
+        "Is the patient's insurance accepted?",
+        "Is the patient new or established?",
+        "What are the self-pay rates?",
+        "Which doctors treat bone problems?",
+    ]
+
+    # Observability
+    METRICS_RESPONSE_HEADERS = os.getenv('METRICS_RESPONSE_HEADERS', '').lower() in ('1', 'true')
+
     # AI/Model Configurations
+    VECTOR_BACKEND = os.getenv('VECTOR_BACKEND', 'chroma')  # 'chroma' or 'numpy'
     VECTOR_DB_COLLECTION_NAME = "care_assistant_rag"
     EMBEDDING_MODEL = "text-embedding-3-small"
+    EMBEDDING_BATCH_SIZE = 100
+
+    # Embedding cache (stored next to the vector DB unless a path is given)
+    EMBEDDING_CACHE_PATH = None
+    EMBEDDING_CACHE_MEMORY_BYTES = 16 * 1024 * 1024
+    EMBEDDING_CACHE_DISK_BYTES = 256 * 1024 * 1024
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
\ No newline at end of file
@@ -0,0 +1,325 @@
+import re
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+DAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+_DAY_TOKENS = {
+    "m": 0, "mo": 0, "mon": 0, "monday": 0,
+    "t": 1, "tu": 1, "tue": 1, "tues": 1, "tuesday": 1,
+    "w": 2, "we": 2, "wed": 2, "wednesday": 2,
+    "th": 3, "r": 3, "thu": 3, "thur": 3, "thurs": 3, "thursday": 3,
+    "f": 4, "fr": 4, "fri": 4, "friday": 4,
+    "sa": 5, "sat": 5, "saturday": 5,
+    "su": 6, "sun": 6, "sunday": 6,
+}
+_DAY_GROUPS = {"weekdays": 0b0011111, "weekends": 0b1100000, "daily": 0b1111111, "everyday": 0b1111111}
+_TIME = r"(?:noon|midnight|\d{1,2}(?::\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.)?)"
+_RANGE_WORDS = r"(?:-|to|through|thru|until|till)"
+_SEGMENT_RE = re.compile(
+    rf"(?P<days>[a-z][a-z ,/&.-]*?)\s*(?P<start>{_TIME})\s*{_RANGE_WORDS}\s*(?P<end>{_TIME})(?![\d:])"
+)
+_DASHES_RE = re.compile(r"\s*[‒–—−]\s*")
+_DAY_RANGE_RE = re.compile(r"\s+(?:to|through|thru|until|till)\s+")
+# Clinic hours written without am/pm ("9-5", "at 3") are read as daytime: 1 to 6 o'clock is pm.
+_BARE_PM_BEFORE = 7
+
+# Parts of the day a question may name instead of a time: [start, end) in minutes.
+DAY_PARTS = {"morning": (8 * 60, 12 * 60), "afternoon": (12 * 60, 17 * 60), "evening": (17 * 60, 21 * 60)}
+_REQUEST_DAY_RE = re.compile(r"\b(today|tomorrow|monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b")
+_REQUEST_DAY_ABBREVIATION_RE = re.compile(
+    r"\b(mon|tue|tues|wed|thu|thur|thurs|fri|sat|sun)\b\.?(?P<time>\s*(?:\d|noon|morning|afternoon|evening|at\b|@))?",
+    re.IGNORECASE
+)
+# Abbreviations that are also ordinary words ("I sat with him") only count capitalized or before a time.
+_AMBIGUOUS_DAY_ABBREVIATIONS = {"mon", "wed", "sat", "sun"}
+_REQUEST_TIME_RE = re.compile(r"\b(noon|\d{1,2}(?::\d{2})?\s*(?:am|pm)|\d{1,2}:\d{2})\b|\b(morning|afternoon|evening)\b")
+_REQUEST_RANGE_RE = re.compile(
+    rf"\b(?P<lead>from\s+|between\s+)?(?P<start>{_TIME})\s*(?P<sep>-|to|and|until|till)\s*(?P<end>{_TIME})(?![\d:])"
+)
+_REQUEST_BARE_HOUR_RE = re.compile(r"\b(?:at|@|around|about)\s+(\d{1,2}(?::\d{2})?)\b(?!\s*(?:am|pm|a\.m|p\.m))")
+_MERIDIEM_RE = re.compile(r"am|pm|a\.m|p\.m|noon|midnight")
+
+def _parse_time(text):
+    """Returns minutes since midnight for '9am', '9:30 pm', '17:00', 'noon'; None if unparseable."""
+    text = text.replace(".", "").replace(" ", "")
+    if text == "noon":
+        return 12 * 60
+    if text == "midnight":
+        return 0
+    match = re.fullmatch(r"(\d{1,2})(?::(\d{2}))?(am|pm)?", text)
+    if not match:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem == "pm" and hour != 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    if hour > 24 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+def _is_bare(text):
+    """True for a 12-hour clock time written without am/pm, such as '9' or '5:30' (but not '17:00')."""
+    if _MERIDIEM_RE.search(text):
+        return False
+    hour = int(re.match(r"\s*(\d{1,2})", text).group(1))
+    return 1 <= hour <= 12
+
+def _bare_hour(minute):
+    """Reads a lone time without am/pm as clinic hours: '10' is 10:00 and '3' is 15:00."""
+    return minute + 12 * 60 if minute < _BARE_PM_BEFORE * 60 else minute
+
+def _parse_range(start_text, end_text):
+    """
+    Returns (start, end) minutes for a time range whose ends may lack am/pm,
+    or None: '9-5' is 09:00-17:00, '9am-5' and '9-5pm' too, '1-5pm' is
+    13:00-17:00 and '1-5' is read as clinic hours, 13:00-17:00.
+    """
+    start, end = _parse_time(start_text), _parse_time(end_text)
+    if start is None or end is None:
+        return None
+    start_bare, end_bare = _is_bare(start_text), _is_bare(end_text)
+    if start_bare and end_bare:
+        if end <= start:
+            end += 12 * 60
+        elif start < _BARE_PM_BEFORE * 60:
+            start, end = start + 12 * 60, end + 12 * 60
+    elif end_bare and end <= start:
+        end += 12 * 60
+    elif start_bare and start + 12 * 60 < end:
+        start += 12 * 60
+    if not start < end <= 24 * 60:
+        return None
+    return start, end
+
+def _parse_days(text):
+    """
+    Returns a weekday bitmask (bit 0 = Monday) for 'M-W', 'Mon–Fri',
+    'Monday through Friday', 'Tu/Th', 'Sa', 'weekdays'; 0 if unparseable.
+    """
+    mask = 0
+    for part in re.split(r"\s*(?:,|/|&|\band\b)\s*", _DAY_RANGE_RE.sub("-", text.strip(" ."))):
+        if not part:
+            continue
+        if part in _DAY_GROUPS:
+            mask |= _DAY_GROUPS[part]
+            continue
+        bounds = [b.strip(" .") for b in part.split("-")]
+        if len(bounds) == 1 and bounds[0] in _DAY_TOKENS:
+            mask |= 1 << _DAY_TOKENS[bounds[0]]
+        elif len(bounds) == 2 and bounds[0] in _DAY_TOKENS and bounds[1] in _DAY_TOKENS:
+            day, last = _DAY_TOKENS[bounds[0]], _DAY_TOKENS[bounds[1]]
+            while True:
+                mask |= 1 << day
+                if day == last:
+                    break
+                day = (day + 1) % 7
+        else:
+            return 0
+    return mask
+
+@lru_cache(maxsize=4096)
+def parse_hours(text):
+    """
+    Parses an opening-hours string into a tuple of (weekday bitmask, start
+    minute, end minute) segments, e.g. "M-W 9am-5pm", "Mon–Wed 09:00–17:00"
+    and "Monday through Wednesday 9 to 5" all give ((0b0000111, 540, 1020),).
+    Several segments may be separated by ';' or ','. Returns an empty tuple
+    if nothing can be parsed.
+    """
+    if not text:
+        return ()
+    normalized = _DASHES_RE.sub("-", text.lower())
+    segments = []
+    for match in _SEGMENT_RE.finditer(normalized):
+        days = _parse_days(match.group("days").strip(" ,;"))
+        minutes = _parse_range(match.group("start"), match.group("end"))
+        if days and minutes is not None:
+            segments.append((days, *minutes))
+    return tuple(segments)
+
+def is_open(segments, day, start, end=None):
+    """True if the parsed hours cover [start, end) (or just `start`) on weekday `day`."""
+    end = start + 1 if end is None else end
+    return any(mask >> day & 1 and seg_start <= start and end <= seg_end for mask, seg_start, seg_end in segments)
+
+def open_window(segments, day, start, end):
+    """Returns the first (start, end) within [start, end) on weekday `day` when the hours are open, or None."""
+    windows = [(max(seg_start, start), min(seg_end, end)) for mask, seg_start, seg_end in segments
+               if mask >> day & 1 and seg_start < end and start < seg_end]
+    return min(windows) if windows else None
+
+def next_opening(segments, day, minute):
+    """Returns (weekday, minute) of the next time the hours open at or after `minute` on `day`, or None."""
+    for offset in range(8):
+        candidate_day = (day + offset) % 7
+        starts = [max(seg_start, minute) if offset == 0 else seg_start
+                  for mask, seg_start, seg_end in segments
+                  if mask >> candidate_day & 1 and (offset > 0 or minute < seg_end)]
+        if starts:
+            return candidate_day, min(starts)
+    return None
+
+def describe_hours(segments):
+    """Formats parsed hours canonically, e.g. 'Monday-Wednesday 09:00-17:00'."""
+    parts = []
+    for mask, start, end in segments:
+        days = [DAY_NAMES[d] for d in range(7) if mask >> d & 1]
+        label = f"{days[0]}-{days[-1]}" if len(days) > 2 and mask >> _first_bit(mask) == (1 << len(days)) - 1 else ", ".join(days)
+        parts.append(f"{label} {format_minute(start)}-{format_minute(end)}")
+    return "; ".join(parts)
+
+def format_minute(minute):
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+def describe_requested_time(requested):
+    """Formats a (weekday, start, end) request, e.g. 'Thursday 15:00' or 'Friday 08:00-12:00'."""
+    day, start, end = requested
+    if end - start >= 24 * 60:
+        return DAY_NAMES[day]
+    if end - start <= 1:
+        return f"{DAY_NAMES[day]} {format_minute(start)}"
+    return f"{DAY_NAMES[day]} {format_minute(start)}-{format_minute(end)}"
+
+def _first_bit(mask):
+    return (mask & -mask).bit_length() - 1
+
+def _find_requested_day(text):
+    """
+    Returns the lowercase day word a question names: a full day name, 'today'
+    or 'tomorrow' first, else an abbreviation such as 'Thu' or 'Sat 3pm'.
+    None if there is none.
+    """
+    match = _REQUEST_DAY_RE.search(text.lower())
+    if match:
+        return match.group(1)
+    for match in _REQUEST_DAY_ABBREVIATION_RE.finditer(text):
+        word = match.group(1)
+        if word.lower() not in _AMBIGUOUS_DAY_ABBREVIATIONS or word[0].isupper() or match.group("time"):
+            return word.lower()
+    return None
+
+def parse_requested_time(text, today=None):
+    """
+    Extracts the day and time a question asks about, e.g. "Thursday 3pm",
+    "Monday at 10", "Tuesday 9-11", "Sat 10am" or "Friday morning". Returns (weekday,
+    start minute, end minute) or None when the question names no day. A time
+    gives a one-minute range, a time range or part of the day its span, and
+    no time at all the whole day. Times without am/pm are read as clinic hours.
+    """
+    word = _find_requested_day(text)
+    if word is None:
+        return None
+    text = text.lower()
+    today = today or date.today()
+    if word == "today":
+        day = today.weekday()
+    elif word == "tomorrow":
+        day = (today + timedelta(days=1)).weekday()
+    else:
+        day = _DAY_TOKENS[word]
+    for range_match in _REQUEST_RANGE_RE.finditer(text):
+        start_text, end_text = range_match.group("start"), range_match.group("end")
+        # "2 and 3" or "9 to 11" alone may be counts; a range needs a dash, a lead word or a clock time.
+        if (range_match.group("lead") or range_match.group("sep") == "-"
+                or not (_is_bare(start_text) and _is_bare(end_text))):
+            minutes = _parse_range(start_text, end_text)
+            if minutes is not None:
+                return day, *minutes
+    time_match = _REQUEST_TIME_RE.search(text)
+    if time_match is None:
+        bare_match = _REQUEST_BARE_HOUR_RE.search(text)
+        start = _parse_time(bare_match.group(1)) if bare_match else None
+        if start is None:
+            return day, 0, 24 * 60
+        start = _bare_hour(start)
+        return day, start, start + 1
+    if time_match.group(2):
+        start, end = DAY_PARTS[time_match.group(2)]
+        return day, start, end
+    start = _parse_time(time_match.group(1))
+    if start is None:
+        return day, 0, 24 * 60
+    return day, start, start + 1
+
+class AvailabilityIndex:
+    """
+    Opening hours of every department in the provider directory, parsed once
+    into weekday bitmasks and minute ranges. Per-department checks are a dict
+    lookup and a few integer comparisons. Directory-wide searches ("which
+    orthopedists are open Friday morning") are vectorized over flat NumPy
+    arrays with one row per hours segment, so they stay fast at tens of
+    thousands of departments.
+    """
+    def __init__(self, providers):
+        self._departments = {}
+        self._unparsed = []
+        self._rows = []
+        specialties = {}
+        masks, starts, ends, specialty_codes = [], [], [], []
+        for provider in providers:
+            provider_id = provider.get("provider_id")
+            if not provider_id:
+                continue
+            code = specialties.setdefault((provider.get("specialty") or "").lower(), len(specialties))
+            for dept in provider.get("departments", []):
+                segments = parse_hours(dept.get("hours"))
+                self._departments[(provider_id, dept.get("name"))] = segments
+                if not segments:
+                    self._unparsed.append((provider_id, dept.get("name"), code))
+                for mask, start, end in segments:
+                    self._rows.append((provider_id, dept.get("name")))
+                    masks.append(mask)
+                    starts.append(start)
+                    ends.append(end)
+                    specialty_codes.append(code)
+        self._specialties = specialties
+        self._masks = np.array(masks, dtype=np.uint8)
+        self._starts = np.array(starts, dtype=np.int16)
+        self._ends = np.array(ends, dtype=np.int16)
+        self._specialty_codes = np.array(specialty_codes, dtype=np.int32)
+
+    def __len__(self):
+        return len(self._departments)
+
+    def hours(self, provider_id, department):
+        """Parsed hours of one department, or an empty tuple."""
+        return self._departments.get((provider_id, department), ())
+
+    def unparsed(self, specialty=None):
+        """Returns [(provider_id, department)] whose hours could not be parsed, optionally of one specialty."""
+        code = None if specialty is None else self._specialties.get(specialty.lower())
+        if specialty is not None and code is None:
+            return []
+        return [(provider_id, department) for provider_id, department, row_code in self._unparsed
+                if code is None or row_code == code]
+
+    def is_available(self, provider_id, department, day, start, end=None):
+        return is_open(self.hours(provider_id, department), day, start, end)
+
+    def find_open(self, day, start, end=None, specialty=None, limit=None):
+        """
+        Returns [(provider_id, department)] open at some time within [start, end)
+        on `day` (at `start` if no end is given), optionally restricted to a
+        specialty, in directory order.
+        """
+        end = start + 1 if end is None else end
+        selected = ((self._masks >> day) & 1).astype(bool)
+        selected &= (self._starts < end) & (self._ends > start)
+        if specialty is not None:
+            code = self._specialties.get(specialty.lower())
+            if code is None:
+                return []
+            selected &= self._specialty_codes == code
+        results = []
+        seen = set()
+        for row in np.flatnonzero(selected):
+            key = self._rows[row]
+            if key not in seen:
+                seen.add(key)
+                results.append(key)
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
@@ -1,8 +1,18 @@
 import json
+import re
 import requests
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 import logging
 
+from core.availability import (
+    AvailabilityIndex, DAY_NAMES, describe_hours, describe_requested_time, format_minute, next_opening, open_window
+)
+from core.metrics import span
+from core.patient_cache import PatientCache
+from core.provider_matcher import ProviderMentionMatcher
+
+ESTABLISHED_WINDOW = timedelta(days=5 * 365)
+
 # Get a logger specific to this module
 logger = logging.getLogger(__name__)
 class CareDataManager:
@@ -10,12 +20,28 @@ class CareDataManager:
     Manages access to hospital system data (from data_sheet.json)
     and patient-specific data (from Flask API).
     """
-    def __init__(self, data_sheet_path, patient_api_base_url):
+    def __init__(self, data_sheet_path, patient_api_base_url, patient_cache_size=1024, patient_cache_ttl=60.0,
+                 patient_cache_generation_check=1.0):
         self.data_sheet_path = data_sheet_path
         self.patient_api_base_url = patient_api_base_url
         self.hospital_data = self._load_hospital_data()
-        self.patient_data_cache = {}
+        self.patient_data_cache = PatientCache(max_entries=patient_cache_size, ttl_seconds=patient_cache_ttl,
+                                               generation_check_seconds=patient_cache_generation_check)
         self._provider_lookup = self._build_provider_lookup()
+        self._providers_by_id = {p["provider_id"]: p for p in self.get_all_providers() if p.get("provider_id")}
+        self._mention_matcher = ProviderMentionMatcher(self.get_all_providers())
+        self.availability = AvailabilityIndex(self.get_all_providers())
+        self._departments = {
+            (p["provider_id"], dept.get("name")): dept
+            for p in self._providers_by_id.values() for dept in p.get("departments", [])
+        }
+        self._appointment_rules = self._build_appointment_rules()
+        # Specialties are recognized by the start of their first word, so "orthopedist" finds Orthopedics.
+        self._specialty_stems = {}
+        for provider in self.get_all_providers():
+            specialty = provider.get("specialty")
+            if specialty:
+                self._specialty_stems.setdefault(specialty.lower().split()[0][:5], specialty)
 
     def _load_hospital_data(self):
         """Loads the structured hospital data from the JSON file."""
@@ -40,24 +66,81 @@ class CareDataManager:
             lookup[norm_name_alt] = provider
         return lookup
 
+    def _build_appointment_rules(self):
+        """Maps each appointment type ('NEW', 'ESTABLISHED') to its duration and arrival instructions."""
+        appointments = self.hospital_data.get("Appointments", {})
+        return {
+            status: {
+                "duration_minutes": rules.get("duration_minutes"),
+                "arrival_instructions": appointments.get("Arrival", {}).get(status)
+            }
+            for status, rules in appointments.get("Types", {}).items()
+        }
+
     def get_patient_data(self, patient_id):
         """
-        Retrieves patient-specific data. This method is designed to be
-        overridden by the app factory to call the database directly.
+        Retrieves patient-specific data through the bounded patient cache.
+        The returned dict is a shallow copy, so callers may add top-level keys
+        but must not mutate nested values in place.
+        """
+        self.patient_data_cache.check_generation(self.fetch_data_generation)
+        patient_data = self.patient_data_cache.get_or_load(str(patient_id), lambda: self._timed_fetch(patient_id))
+        return dict(patient_data) if patient_data is not None else None
+
+    def get_many_patient_data(self, patient_ids):
+        """
+        Like get_patient_data for several patients at once: returns
+        {patient_id: shallow copy or None}, loading every cache miss with one
+        fetch_many_patient_data call.
         """
-        if patient_id in self.patient_data_cache:
-            return self.patient_data_cache[patient_id]
+        keys = {patient_id: str(patient_id) for patient_id in patient_ids}
+
+        def load(missing_keys):
+            wanted = set(missing_keys)
+            missing = [patient_id for patient_id, key in keys.items() if key in wanted]
+            with span("patient_load"):
+                loaded = self.fetch_many_patient_data(missing)
+            return {str(patient_id): record for patient_id, record in loaded.items() if record is not None}
+
+        self.patient_data_cache.check_generation(self.fetch_data_generation)
+        records = self.patient_data_cache.get_many_or_load(list(keys.values()), load)
+        return {patient_id: dict(records[key]) if records.get(key) is not None else None
+                for patient_id, key in keys.items()}
+
+    def fetch_many_patient_data(self, patient_ids):
+        """
+        Loads several patient records from their source, bypassing the cache.
+        This default fetches them one by one; the app factory overrides it
+        with batched database queries.
+        """
+        return {patient_id: self.fetch_patient_data(patient_id) for patient_id in patient_ids}
+
+    def _timed_fetch(self, patient_id):
+        with span("patient_load"):
+            return self.fetch_patient_data(patient_id)
 
+    def fetch_patient_data(self, patient_id):
+        """
+        Loads a patient record from its source, bypassing the cache. This
+        method is designed to be overridden by the app factory to call the
+        database directly.
+        """
         try:
             response = requests.get(f"{self.patient_api_base_url}/patient/{patient_id}")
             response.raise_for_status()
-            patient_data = response.json()
-            self.patient_data_cache[patient_id] = patient_data
-            return patient_data
+            return response.json()
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching patient data for ID {patient_id}: {e}")
             return None
 
+    def fetch_data_generation(self):
+        """
+        Returns a marker that changes whenever patient data is bulk-written,
+        possibly by another process, or None if the source has none. The app
+        factory overrides it to read the database's generation row.
+        """
+        return None
+
     def get_provider_info(self, provider_name):
         """
         Retrieves detailed information for a specific provider.
@@ -80,6 +163,74 @@ class CareDataManager:
         """Returns a list of all providers."""
         return self.hospital_data.get("ProviderDirectory", [])
 
+    def get_provider_by_id(self, provider_id):
+        """Returns the directory entry for a provider_id, or None."""
+        return self._providers_by_id.get(provider_id)
+
+    def find_mentioned_providers(self, text, patient_name=None):
+        """
+        Returns the directory entries of providers whose name or alias appears
+        in `text`, best match first. Words of `patient_name` are not taken as
+        provider mentions.
+        """
+        return [self._providers_by_id[provider_id]
+                for provider_id in self._mention_matcher.match(text, ignore=(patient_name,))]
+
+    def find_mentioned_specialty(self, text):
+        """Returns the single specialty named in `text`, or None if there is none or several."""
+        found = {self._specialty_stems[token[:5]] for token in re.findall(r"[a-z]+", text.lower())
+                 if len(token) >= 5 and token[:5] in self._specialty_stems}
+        return found.pop() if len(found) == 1 else None
+
+    def check_provider_availability(self, provider_id, requested, department=None):
+        """
+        Checks a requested (weekday, start minute, end minute) against a
+        provider's department hours, or only `department`'s (e.g. the referred
+        location). A location is open if its hours overlap the request; for a
+        part of the day, `open_between` says when. Returns a dict of facts for
+        the chat context, or None if any of those hours cannot be parsed, so
+        the model compares the raw hours itself rather than trusting a
+        partial answer.
+        """
+        provider = self.get_provider_by_id(provider_id) or {}
+        day, start, end = requested
+        locations = []
+        for dept in provider.get("departments", []):
+            if department is not None and dept.get("name") != department:
+                continue
+            segments = self.availability.hours(provider_id, dept.get("name"))
+            if not segments:
+                return None
+            window = open_window(segments, day, start, end)
+            location = {"department": dept.get("name"), "hours": describe_hours(segments), "open": window is not None}
+            if window is not None and end - start > 1:
+                location["open_between"] = f"{format_minute(window[0])}-{format_minute(window[1])}"
+            elif window is None:
+                opening = next_opening(segments, day, start)
+                if opening is not None:
+                    location["next_opening"] = f"{DAY_NAMES[opening[0]]} {format_minute(opening[1])}"
+            locations.append(location)
+        return {"requested": describe_requested_time(requested), "locations": locations}
+
+    def find_unparsed_hours(self, specialty=None):
+        """Lists providers (optionally of one specialty) whose department hours could not be parsed, with the raw text."""
+        results = []
+        for provider_id, department in self.availability.unparsed(specialty):
+            dept = self._departments.get((provider_id, department)) or {}
+            results.append({"provider": self._providers_by_id[provider_id]["name"], "department": department,
+                            "hours": dept.get("hours")})
+        return results
+
+    def find_open_providers(self, requested, specialty=None, limit=10):
+        """Lists providers (optionally of one specialty) whose department hours overlap a requested time."""
+        day, start, end = requested
+        results = []
+        for provider_id, department in self.availability.find_open(day, start, end, specialty, limit):
+            provider = self._providers_by_id[provider_id]
+            results.append({"provider": provider["name"], "department": department,
+                            "hours": describe_hours(self.availability.hours(provider_id, department))})
+        return results
+
     def get_insurance_status(self, payer_name):
         """
         Checks if a given insurance payer is accepted by the hospital.
@@ -93,26 +244,80 @@ class CareDataManager:
         Determines if a patient is 'ESTABLISHED' with a given provider
         based on appointments in the last 5 years.
         """
-        patient_data = self.get_patient_data(patient_id)
-        if not patient_data:
-            return False
-
         provider_info = self.get_provider_info(provider_name)
         if not provider_info:
             return False
 
-        search_provider_id = provider_info.get('provider_id')
-        five_years_ago = datetime.now() - timedelta(days=5 * 365)
+        provider_id = provider_info.get('provider_id')
+        with span("established_check"):
+            status = self.get_provider_statuses(patient_id, [provider_id]).get(provider_id) or {}
+        return _is_established(status.get("last_completed"))
 
+    def get_provider_statuses(self, patient_id, provider_ids):
+        """
+        Returns {provider_id: {"last_completed", "referred_department"}}: the
+        date of the patient's latest completed appointment with each provider
+        and the department of the first referral to them. This default derives
+        both from the fetched patient record; the app factory overrides it
+        with a lookup in the materialized patient_provider_status table.
+        """
+        patient_data = self.get_patient_data(patient_id)
+        if not patient_data:
+            return {}
+        wanted = set(provider_ids)
+        statuses = {}
         for appt in patient_data.get("appointments", []):
-            if appt.get("status") != "completed":
+            if appt.get("status") != "completed" or appt.get("provider_id") not in wanted:
                 continue
+            try:
+                appt_date = datetime.fromisoformat(appt["date"]).date().isoformat()
+            except (ValueError, KeyError):
+                logger.warning(f"Could not parse appointment date: {appt.get('date')}")
+                continue
+            status = statuses.setdefault(appt["provider_id"], {"last_completed": None, "referred_department": None})
+            status["last_completed"] = max(status["last_completed"] or appt_date, appt_date)
+        for referral in patient_data.get("referred_providers", []):
+            if referral.get("provider_id") in wanted:
+                status = statuses.setdefault(referral["provider_id"], {"last_completed": None, "referred_department": None})
+                if status["referred_department"] is None:
+                    status["referred_department"] = referral.get("department")
+        return statuses
+
+    def get_provider_facts(self, patient_id, providers):
+        """
+        Returns the NEW/ESTABLISHED status, appointment rules and referred
+        location of each provider as chat context fields (`status_with_...`,
+        `rules_for_...`, `referred_location_for_...`), from one status lookup
+        and the rules and departments indexed at load.
+        """
+        if not providers:
+            return {}
+        with span("established_check"):
+            statuses = self.get_provider_statuses(patient_id, [p["provider_id"] for p in providers])
+        facts = {}
+        for provider in providers:
+            provider_id = provider["provider_id"]
+            status_row = statuses.get(provider_id) or {}
+            status = "ESTABLISHED" if _is_established(status_row.get("last_completed")) else "NEW"
+            facts[f"status_with_{provider_id}"] = status
+            if status in self._appointment_rules:
+                facts[f"rules_for_{provider_id}"] = self._appointment_rules[status]
+            department = self._departments.get((provider_id, status_row.get("referred_department")))
+            if department is not None:
+                facts[f"referred_location_for_{provider_id}"] = department
+        return facts
+
+def established_cutoff(now=None):
+    """
+    The earliest completed-visit date that still makes a patient ESTABLISHED:
+    the first date on or after five years (5 * 365 days) before `now`.
+    """
+    since = (now or datetime.now()) - ESTABLISHED_WINDOW
+    cutoff = since.date()
+    if datetime.combine(cutoff, time()) < since:
+        cutoff += timedelta(days=1)
+    return cutoff.isoformat()
 
-            if appt.get("provider_id") == search_provider_id:
-                try:
-                    appt_date = datetime.fromisoformat(appt["date"])
-                    if appt_date >= five_years_ago:
-                        return True
-                except (ValueError, KeyError):
-                    logger.warning(f"Could not parse appointment date: {appt.get('date')}")
-        return False
\ No newline at end of file
+def _is_established(last_completed):
+    # Compared against today's cutoff on every read, so statuses lapse as the window rolls forward.
+    return bool(last_completed) and last_completed >= established_cutoff()
@@ -0,0 +1,170 @@
+import json
+import logging
+from datetime import date
+
+from core.provider_matcher import tokenize
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+# Words that signal what a question is about; a prompt may carry several intents.
+INTENT_KEYWORDS = {
+    "insurance": {"insurance", "insured", "payer", "plan", "coverage", "covered", "accept", "accepted",
+                  "accepts", "self", "pay", "cost", "costs", "price", "rate", "rates", "copay"},
+    "scheduling": {"book", "booking", "schedule", "scheduling", "reschedule", "appointment", "appointments",
+                   "available", "availability", "hours", "open", "when", "time", "slot", "today", "tomorrow",
+                   "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"},
+    "history": {"history", "last", "previous", "past", "before", "noshow", "missed", "cancelled",
+                "canceled", "seen", "visits", "visited"},
+    "referral": {"refer", "referral", "referrals", "referred", "specialist"},
+}
+
+# Appointment fields worth sending; the rest (timezone, address, location name) repeat the department.
+APPOINTMENT_CONTEXT_FIELDS = ("date", "time", "provider", "department", "status", "reason")
+
+KNOWLEDGE_KEY = "Semantically Relevant Hospital Knowledge"
+PATIENT_KEY = "Full Patient Record"
+
+def detect_intents(prompt):
+    """Returns the set of intents whose keywords occur in the prompt."""
+    tokens = set(tokenize(prompt))
+    return {intent for intent, keywords in INTENT_KEYWORDS.items() if tokens & keywords}
+
+class TokenCounter:
+    """
+    Counts tokens with tiktoken when its encoding can be loaded (it is fetched
+    once and cached on disk), otherwise estimates about four characters per token.
+    """
+    def __init__(self, encoding_name="o200k_base"):
+        self.encoding_name = encoding_name
+        self._encoding = None
+        try:
+            import tiktoken
+            self._encoding = tiktoken.get_encoding(encoding_name)
+        except Exception as e:
+            logger.warning(f"Tokenizer {encoding_name} unavailable, estimating token counts: {e}")
+
+    @property
+    def exact(self):
+        return self._encoding is not None
+
+    def count(self, text):
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return (len(text) + 3) // 4
+
+class ContextBuilder:
+    """
+    Builds the context part of the chat prompt: prunes the patient record to
+    what the detected intents and mentioned providers need, keeps only recent
+    and upcoming appointments, and serializes compactly, dropping the oldest
+    appointments and then the least relevant documents until the result fits
+    `token_budget`.
+    """
+    def __init__(self, token_budget=2000, max_appointments=5, max_history_appointments=20,
+                 report_savings=True, token_counter=None):
+        self.token_budget = token_budget
+        self.max_appointments = max_appointments
+        self.max_history_appointments = max_history_appointments
+        self.report_savings = report_savings
+        self.token_counter = token_counter or TokenCounter()
+
+    def build(self, prompt, documents, patient_data, provider_ids=(), today=None, intents=None):
+        """
+        Returns (context string, report). `documents` are the retrieved hospital
+        documents, most relevant first; `provider_ids` are the providers mentioned
+        in the prompt. `intents` overrides the ones detected from the prompt. The
+        report holds the context's token count, how many of the documents fit and,
+        when `report_savings` is on, the count for the unpruned, indented serialization.
+        """
+        intents = detect_intents(prompt) if intents is None else set(intents)
+        today = (today or date.today()).isoformat()
+        record = self._prune_record(patient_data, intents, set(provider_ids))
+        past, upcoming = self._select_appointments(
+            patient_data.get("appointments") or [], intents, set(provider_ids), today
+        )
+        all_documents = documents
+        documents = list(documents)
+
+        while True:
+            context = self._serialize(documents, record, past, upcoming, len(patient_data.get("appointments") or []))
+            tokens = self.token_counter.count(context)
+            if tokens <= self.token_budget:
+                break
+            # Over budget: give up history first, then the least relevant knowledge.
+            if past:
+                past.pop()
+            elif len(documents) > 1:
+                documents.pop()
+            else:
+                logger.warning(f"Chat context needs {tokens} tokens, over the budget of {self.token_budget}.")
+                break
+
+        report = {"tokens": tokens, "intents": sorted(intents), "documents": len(documents)}
+        if self.report_savings:
+            # What the prompt used to carry: every document and the whole record, indented.
+            baseline = json.dumps({KNOWLEDGE_KEY: "\n".join(all_documents), PATIENT_KEY: patient_data}, indent=2)
+            report["baseline_tokens"] = self.token_counter.count(baseline)
+            report["tokens_saved"] = report["baseline_tokens"] - tokens
+        return context, report
+
+    def build_addition(self, documents, patient_facts):
+        """
+        Serializes context that adds to what a conversation already holds: new
+        documents and new patient fields. Returns (context string or None, report).
+        """
+        addition = {}
+        if documents:
+            addition[KNOWLEDGE_KEY] = documents
+        if patient_facts:
+            addition[PATIENT_KEY] = patient_facts
+        if not addition:
+            return None, {"tokens": 0}
+        context = json.dumps(addition, separators=(",", ":"), ensure_ascii=False)
+        return context, {"tokens": self.token_counter.count(context)}
+
+    def _prune_record(self, patient_data, intents, provider_ids):
+        record = {key: value for key, value in patient_data.items()
+                  if key not in ("appointments", "referred_providers")}
+        if intents and "insurance" not in intents:
+            # Member and group numbers only matter for insurance questions; payer and acceptance stay.
+            insurance = record.get("insurance") or {}
+            record["insurance"] = {
+                tier: {k: v for k, v in plan.items() if k in ("payer", "plan", "is_accepted")} if plan else plan
+                for tier, plan in insurance.items()
+            }
+        referrals = patient_data.get("referred_providers") or []
+        if provider_ids and "referral" not in intents:
+            referrals = [r for r in referrals if _referral_provider_ids(r) & provider_ids]
+        if referrals:
+            record["referred_providers"] = referrals
+        return record
+
+    def _select_appointments(self, appointments, intents, provider_ids, today):
+        """Returns (recent past appointments, newest first; upcoming appointments, soonest first)."""
+        if provider_ids and "history" not in intents:
+            appointments = [a for a in appointments if a.get("provider_id") in provider_ids]
+        limit = self.max_history_appointments if "history" in intents else self.max_appointments
+        appointments = sorted(appointments, key=lambda a: (a.get("date") or "", a.get("time") or ""))
+        past = [a for a in appointments if (a.get("date") or "") < today]
+        upcoming = [a for a in appointments if (a.get("date") or "") >= today]
+        recent = past[-limit:] if limit else []
+        return [_compact_appointment(a) for a in reversed(recent)], [_compact_appointment(a) for a in upcoming]
+
+    @staticmethod
+    def _serialize(documents, record, past, upcoming, total_appointments):
+        record = dict(record)
+        record["appointments"] = upcoming[::-1] + past
+        omitted = total_appointments - len(record["appointments"])
+        if omitted > 0:
+            record["appointments_omitted"] = omitted
+        return json.dumps({KNOWLEDGE_KEY: documents, PATIENT_KEY: record},
+                          separators=(",", ":"), ensure_ascii=False)
+
+def _referral_provider_ids(referral):
+    ids = {referral.get("provider_id")}
+    ids.update(c.get("provider_id") for c in referral.get("candidate_providers") or [])
+    return ids
+
+def _compact_appointment(appointment):
+    return {key: appointment[key] for key in APPOINTMENT_CONTEXT_FIELDS if appointment.get(key) is not None}
@@ -0,0 +1,196 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+def normalize_text(text):
+    """Collapses whitespace and case so trivially different prompts share a cache entry."""
+    return " ".join(text.split()).casefold()
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of embedding vectors keyed by (model name, normalized text).
+    Lookups go through an in-memory LRU tier first and fall back to a SQLite file
+    on disk; both tiers are bounded by the number of bytes of vector data they hold.
+    """
+    def __init__(self, db_path, memory_max_bytes=16 * 1024 * 1024, disk_max_bytes=256 * 1024 * 1024):
+        self.db_path = db_path
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._connect()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL, "
+            "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._disk_bytes = self._read_disk_bytes()
+
+    def _connect(self):
+        self._pid = os.getpid()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+    def _ensure_process_local(self):
+        """SQLite connections must not cross a fork; a forked worker reopens the disk tier."""
+        if self._pid != os.getpid():
+            self._connect()
+
+    @staticmethod
+    def make_key(model_name, text):
+        """Returns the content address for a (model, text) pair."""
+        return hashlib.sha256(f"{model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def get_many(self, model_name, texts):
+        """Returns a list aligned with `texts` holding cached vectors or None for misses."""
+        keys = [self.make_key(model_name, text) for text in texts]
+        results = [None] * len(texts)
+        disk_lookups = {}
+        with self._lock:
+            self._ensure_process_local()
+            for i, key in enumerate(keys):
+                blob = self._memory.get(key)
+                if blob is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = self._decode(blob)
+                    self.hits += 1
+                else:
+                    disk_lookups.setdefault(key, []).append(i)
+
+            if disk_lookups:
+                placeholders = ",".join("?" * len(disk_lookups))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    list(disk_lookups),
+                ).fetchall()
+                now = time.time()
+                for key, blob in rows:
+                    self._remember(key, blob)
+                    for i in disk_lookups.pop(key):
+                        results[i] = self._decode(blob)
+                        self.hits += 1
+                        self.disk_hits += 1
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, key) for key, _ in rows],
+                    )
+                    self._conn.commit()
+                self.misses += sum(len(indexes) for indexes in disk_lookups.values())
+        return results
+
+    def put_many(self, model_name, texts, vectors):
+        """Stores freshly computed vectors in both tiers."""
+        now = time.time()
+        rows = []
+        with self._lock:
+            self._ensure_process_local()
+            for text, vector in zip(texts, vectors):
+                key = self.make_key(model_name, text)
+                blob = array("f", vector).tobytes()
+                self._remember(key, blob)
+                rows.append((key, model_name, blob, len(blob), now))
+            if not rows:
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model, vector, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                # Other workers write to the same file, so the size is re-read under the write lock.
+                self._disk_bytes = self._read_disk_bytes()
+                self._evict_disk()
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def embed(self, model_name, texts, embed_fn):
+        """
+        Returns embeddings for `texts`, calling `embed_fn` only for the texts
+        that are not already cached. Duplicate texts are embedded once.
+        """
+        vectors = self.get_many(model_name, texts)
+        missing = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(self.make_key(model_name, texts[i]), []).append(i)
+        if missing:
+            to_embed = [texts[indexes[0]] for indexes in missing.values()]
+            computed = [list(map(float, v)) for v in embed_fn(to_embed)]
+            self.put_many(model_name, to_embed, computed)
+            for indexes, vector in zip(missing.values(), computed):
+                for i in indexes:
+                    vectors[i] = vector
+        return vectors
+
+    def stats(self):
+        """Returns hit/miss counters and current tier sizes."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def _remember(self, key, blob):
+        """Inserts into the memory tier and evicts least recently used entries over budget."""
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        if len(blob) > self.memory_max_bytes:
+            return
+        self._memory[key] = blob
+        self._memory_bytes += len(blob)
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _read_disk_bytes(self):
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    def _evict_disk(self):
+        """Deletes least recently used rows until the disk tier fits its budget."""
+        while self._disk_bytes > self.disk_max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM embeddings ORDER BY last_used LIMIT 256"
+            ).fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                return
+            freed = []
+            for key, size in rows:
+                if self._disk_bytes <= self.disk_max_bytes:
+                    break
+                freed.append((key,))
+                self._disk_bytes -= size
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", freed)
+            logger.info(f"Evicted {len(freed)} embeddings from the disk cache.")
+
+    @staticmethod
+    def _decode(blob):
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist()
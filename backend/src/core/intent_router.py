@@ -0,0 +1,156 @@
+import re
+
+# Questions about booking, times, referrals or advice need the full context and the LLM.
+_DEFER_RE = re.compile(
+    r"\b(book\w*|schedul\w*|reschedul\w*|cancel\w*|availab\w*|should|recommend\w*|why|next|compare|"
+    r"refer\w*|today|tomorrow|tonight|morning|afternoon|evening|week|monday|tuesday|wednesday|thursday|"
+    r"friday|saturday|sunday|mon|tue|tues|wed|thu|thur|thurs|fri|sat|sun|\d{1,2}(:\d{2})?\s*(am|pm)|noon)\b"
+)
+_INTENT_PATTERNS = {
+    "insurance": re.compile(r"\b(accept\w*|take|takes|covered|in[- ]network)\b"),
+    "established_status": re.compile(r"\b(established|new patient|new or|or new)\b"),
+    "provider_hours": re.compile(r"\b(hours|open|opening|located|locations?|address\w*|where|departments?|phone)\b"),
+    "self_pay": re.compile(r"\b(self[- ]?pay|cash price|out[- ]of[- ]pocket|uninsured)\b"),
+}
+# The only insurance questions answered directly: "Is/Are <payer> accepted?", "Do you accept <payer>?"
+# and close variants, where <payer> is one known payer or the patient's own insurance.
+_INSURANCE_QUESTION_RES = (
+    re.compile(r"(?:is|are) (?P<payer>.+?) (?:accepted|covered|taken|in[- ]network)"
+               r"(?: here| at (?:the|this|our) (?:clinic|hospital|practice))?"),
+    re.compile(r"(?:do|does|will|can) (?:you|we|they|the (?:clinic|hospital|practice)) (?:accept|take) (?P<payer>.+?)"
+               r"(?: here| at (?:the|this|our) (?:clinic|hospital|practice))?"),
+)
+# Negations, several payers or several questions in one message: leave them to the LLM.
+_NEGATION_RE = re.compile(r"\b(?:not|no|never|nor|except|without)\b|n't\b")
+_CONJUNCTION_RE = re.compile(r"\b(?:and|or|also|too|plus|either|both)\b|[,;/&+]")
+_OWN_INSURANCE_RE = re.compile(r"(?:his|her|their|(?:the )?patient'?s) (?:primary )?(?:insurance|plan|coverage|payer)")
+_PAYER_SUFFIX_RE = re.compile(r" (?:insurance|plan|coverage)$")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+class IntentRouter:
+    """
+    Answers narrow factual questions (insurance acceptance, NEW/ESTABLISHED
+    status, a provider's locations and hours, self-pay rates) directly from
+    CareDataManager's in-memory data with templated text. route() returns None
+    for anything it cannot answer with certainty: several or no intents, a
+    question about booking or times, an unknown payer, zero or several
+    providers. Insurance questions must match one narrow phrasing about a
+    single payer, without negation. Those go through retrieval and the LLM as before.
+    """
+    def __init__(self, data_manager, max_words=20):
+        self.data_manager = data_manager
+        self.max_words = max_words
+        hospital_data = data_manager.hospital_data
+        self.self_pay = hospital_data.get("SelfPay", {})
+        self.appointment_rules = hospital_data.get("Appointments", {})
+        self._payers = self._build_payer_index(hospital_data.get("AcceptedInsurances", []))
+        self._specialties = {specialty.lower(): specialty for specialty in self.self_pay}
+
+    @staticmethod
+    def _build_payer_index(payers):
+        """Maps lowercase names, spaceless names and acronyms of accepted payers to their canonical names."""
+        index = {}
+        for payer in payers:
+            words = _WORD_RE.findall(payer.lower())
+            index[" ".join(words)] = payer
+            if len(words) > 1:
+                index["".join(words)] = payer
+                index["".join(w[0] for w in words)] = payer
+        return index
+
+    def route(self, prompt, patient_id):
+        """Returns {"intent", "response"} for a question answered without the LLM, or None."""
+        text = prompt.lower().replace("\u2019", "'")
+        if prompt.count("?") > 1 or len(_WORD_RE.findall(text)) > self.max_words or _DEFER_RE.search(text):
+            return None
+        intents = [intent for intent, pattern in _INTENT_PATTERNS.items() if pattern.search(text)]
+        if len(intents) != 1:
+            return None
+        patient_data = self.data_manager.get_patient_data(patient_id)
+        if not patient_data:
+            # Let the regular path report the missing patient.
+            return None
+        providers = self.data_manager.find_mentioned_providers(prompt, patient_data.get("name"))
+        response = getattr(self, f"_answer_{intents[0]}")(text, patient_id, patient_data, providers)
+        if response is None:
+            return None
+        return {"intent": intents[0], "response": response}
+
+    def _answer_insurance(self, text, patient_id, patient_data, providers):
+        if providers:
+            return None
+        question = " ".join(text.split()).rstrip("?.! ")
+        if _NEGATION_RE.search(question) or _CONJUNCTION_RE.search(question):
+            return None
+        slot = next((m.group("payer") for m in (r.fullmatch(question) for r in _INSURANCE_QUESTION_RES) if m), None)
+        if slot is None:
+            return None
+        if not _OWN_INSURANCE_RE.fullmatch(slot):
+            payer = self._find_payer(slot)
+            return self._insurance_answer(payer, accepted=True) if payer is not None else None
+        primary = (patient_data.get("insurance") or {}).get("primary") or {}
+        if not primary.get("payer"):
+            return None
+        accepted = self.data_manager.get_insurance_status(primary["payer"])
+        plan = f" ({primary['plan']})" if primary.get("plan") else ""
+        return (f"{patient_data.get('name', 'The patient')}'s primary insurance, **{primary['payer']}**{plan}, "
+                + self._insurance_answer(primary["payer"], accepted, lead=False))
+
+    def _insurance_answer(self, payer, accepted, lead=True):
+        if accepted:
+            return f"Yes, **{payer}** is accepted." if lead else "is accepted."
+        answer = f"No, **{payer}** is not accepted." if lead else "is **not** accepted."
+        return answer + " The patient can be seen at self-pay rates:\n" + self._self_pay_lines(self.self_pay)
+
+    def _answer_established_status(self, text, patient_id, patient_data, providers):
+        if len(providers) != 1:
+            return None
+        provider = providers[0]
+        status = "ESTABLISHED" if self.data_manager.check_established_patient(patient_id, provider["name"]) else "NEW"
+        rules = self.appointment_rules.get("Types", {}).get(status, {})
+        arrival = self.appointment_rules.get("Arrival", {}).get(status)
+        answer = f"**{patient_data.get('name', 'The patient')}** is **{status}** with **{provider['name']}**"
+        answer += " (a completed visit within the last 5 years)." if status == "ESTABLISHED" else " (no completed visit in the last 5 years)."
+        if rules.get("duration_minutes"):
+            answer += f" {status} appointments are **{rules['duration_minutes']} minutes**"
+            answer += f"; the patient should {arrival}." if arrival else "."
+        return answer
+
+    def _answer_provider_hours(self, text, patient_id, patient_data, providers):
+        if len(providers) != 1:
+            return None
+        provider = providers[0]
+        referred = {r.get("department") for r in patient_data.get("referred_providers", [])
+                    if r.get("provider_id") == provider.get("provider_id")}
+        lines = [f"**{provider['name']}** ({provider.get('specialty', 'unknown specialty')}) practices at:"]
+        for dept in provider.get("departments", []):
+            line = f"- **{dept.get('name')}**: {dept.get('address')}, {dept.get('phone')}. Hours: {dept.get('hours')}"
+            if dept.get("name") in referred:
+                line += " (the patient's referred location)"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def _answer_self_pay(self, text, patient_id, patient_data, providers):
+        if not self.self_pay or len(providers) > 1:
+            return None
+        if providers:
+            specialty = providers[0].get("specialty")
+            if specialty not in self.self_pay:
+                return None
+            return f"The self-pay rate for **{specialty}** ({providers[0]['name']}) is **${self.self_pay[specialty]}**."
+        mentioned = [name for key, name in self._specialties.items() if key in text]
+        if len(mentioned) == 1:
+            return f"The self-pay rate for **{mentioned[0]}** is **${self.self_pay[mentioned[0]]}**."
+        return "Self-pay rates:\n" + self._self_pay_lines(self.self_pay)
+
+    def _find_payer(self, slot):
+        """Returns the accepted payer named by the whole of `slot`, or None (possibly a payer we do not know)."""
+        words = " ".join(_WORD_RE.findall(_PAYER_SUFFIX_RE.sub("", slot)))
+        payer = self._payers.get(words)
+        if payer is None and words.count(" ") < 3:
+            payer = self._payers.get(words.replace(" ", ""))
+        return payer
+
+    @staticmethod
+    def _self_pay_lines(rates):
+        return "\n".join(f"- {specialty}: ${rate}" for specialty, rate in rates.items())
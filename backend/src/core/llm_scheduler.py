@@ -0,0 +1,116 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+# Transient failures worth retrying; anything else (bad request, auth) fails the call at once.
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+
+def _retry_after_seconds(error):
+    """Reads the server's Retry-After hint from an OpenAI error, or None."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+class LLMScheduler:
+    """
+    Runs LLM calls on a bounded thread pool shared by every request in the
+    process, so a 200-patient batch never has more than `max_concurrency`
+    calls in flight and concurrent batches queue behind each other instead
+    of multiplying. Transient errors are retried with exponential backoff and
+    jitter, up to `max_retries` times. A rate-limit error pauses every call
+    in the process until the server's Retry-After has passed, since the limit
+    applies to the API key rather than to one call. `client` is the OpenAI
+    client scheduled calls should use; it must have the SDK's own retries
+    turned off (max_retries=0), or every attempt here would itself be retried.
+    """
+    def __init__(self, max_concurrency=8, max_retries=4, base_delay=0.5, max_delay=30.0, client=None):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+        self._in_flight = 0
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+
+    def submit(self, fn, *args, **kwargs):
+        """Queues `fn(*args, **kwargs)` and returns a Future for its result."""
+        return self._executor.submit(self._call_with_retries, fn, args, kwargs)
+
+    def stats(self):
+        """Returns call, retry and failure counters and the calls currently running."""
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight,
+                "calls": self.calls,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "failures": self.failures,
+            }
+
+    def _call_with_retries(self, fn, args, kwargs):
+        attempt = 0
+        while True:
+            self._wait_for_rate_limit()
+            with self._lock:
+                self.calls += 1
+                self._in_flight += 1
+            try:
+                return fn(*args, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                logger.warning(f"LLM call failed ({type(e).__name__}); retry {attempt}/{self.max_retries} in {delay:.1f}s.")
+            except Exception:
+                with self._lock:
+                    self.failures += 1
+                raise
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+            time.sleep(delay)
+
+    def _backoff(self, attempt, error):
+        """Returns the delay before the next attempt, and pauses the whole process after a rate limit."""
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+        with self._lock:
+            self.retries += 1
+            if isinstance(error, openai.RateLimitError):
+                self.rate_limited += 1
+                delay = max(delay, min(self.max_delay, _retry_after_seconds(error) or 0.0))
+                self._resume_at = max(self._resume_at, time.monotonic() + delay)
+        return delay
+
+    def _wait_for_rate_limit(self):
+        while True:
+            with self._lock:
+                remaining = self._resume_at - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
@@ -0,0 +1,196 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Per-request stage durations in milliseconds, set by the API layer for the duration of a request.
+current_timings = contextvars.ContextVar("current_timings", default=None)
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values)) + (extra or [])
+    if not pairs:
+        return ""
+    escaped = (
+        name + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+class Histogram:
+    """A labelled Prometheus histogram. Observing is a bisect plus two additions under a lock."""
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self, const_labels=()):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        const_labels = list(const_labels)
+        with self._lock:
+            snapshot = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, const_labels + [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels, const_labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels, const_labels)} {count}")
+        return lines
+
+class Counter:
+    """A labelled Prometheus counter."""
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self, const_labels=()):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for labels, value in sorted(snapshot.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels, list(const_labels))} {value}")
+        return lines
+
+class CallbackCollector:
+    """Exports values computed at scrape time from a callback returning {labels_tuple: value}."""
+    def __init__(self, name, help_text, labelnames, callback, metric_type="gauge"):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self.metric_type = metric_type
+
+    def reset(self):
+        pass
+
+    def render(self, const_labels=()):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        for labels, value in sorted(self.callback().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels, list(const_labels))} {value}")
+        return lines
+
+class Registry:
+    """
+    Holds metrics and renders them in the Prometheus text exposition format.
+
+    Metrics live in process memory, and gunicorn runs several workers, each
+    answering /metrics with only its own numbers. Rather than aggregating
+    through a shared store, every series carries a `pid` label naming the
+    worker, so successive scrapes never mix workers. Sum across workers in
+    queries, e.g. `sum without (pid) (rate(care_chat_answers_total[5m]))`.
+    A forked worker starts from empty metrics, so what the master recorded
+    while preloading is not counted once per worker.
+    """
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Clears every recorded value; called in each forked child."""
+        self._lock = threading.Lock()
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        const_labels = [("pid", os.getpid())]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render(const_labels))
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+os.register_at_fork(after_in_child=REGISTRY.reset)
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "care_stage_duration_seconds", "Duration of individual request pipeline stages.", ("stage",)))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "care_http_request_duration_seconds", "HTTP request latency.", ("endpoint", "method", "status")))
+TOKENS = REGISTRY.register(Histogram(
+    "care_llm_tokens", "Prompt and completion tokens per LLM call.", ("kind",), TOKEN_BUCKETS))
+CONTEXT_BYTES = REGISTRY.register(Histogram(
+    "care_llm_context_bytes", "Size of the serialized context sent to the LLM.", (), SIZE_BUCKETS))
+CHAT_ANSWERS = REGISTRY.register(Counter(
+    "care_chat_answers_total", "Chat answers by path: fast (templated, no LLM), cache or rag.", ("path",)))
+CONTEXT_TOKENS = REGISTRY.register(Histogram(
+    "care_llm_context_tokens", "Context tokens sent to the LLM, and what the unpruned context would have used.",
+    ("kind",), TOKEN_BUCKETS))
+
+@contextmanager
+def span(stage):
+    """
+    Times a block, records it in the stage histogram and, when a request is
+    being timed, into that request's `current_timings` dict.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage)
+        timings = current_timings.get()
+        if timings is not None:
+            timings[f"{stage}_ms"] = timings.get(f"{stage}_ms", 0.0) + elapsed * 1000
+
+def record_context_tokens(report):
+    """Records the context builder's token report for the current request."""
+    CONTEXT_TOKENS.observe(report["tokens"], "sent")
+    if "baseline_tokens" in report:
+        CONTEXT_TOKENS.observe(report["baseline_tokens"], "baseline")
+    timings = current_timings.get()
+    if timings is not None:
+        timings["context_tokens"] = report["tokens"]
+        if "tokens_saved" in report:
+            timings["context_tokens_saved"] = report["tokens_saved"]
+
+def record_usage(usage):
+    """Records prompt/completion token counts from an OpenAI `usage` object, if present."""
+    if usage is None:
+        return
+    TOKENS.observe(usage.prompt_tokens, "prompt")
+    TOKENS.observe(usage.completion_tokens, "completion")
+    timings = current_timings.get()
+    if timings is not None:
+        timings["prompt_tokens"] = usage.prompt_tokens
+        timings["completion_tokens"] = usage.completion_tokens
@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import OrderedDict
+
+class PatientCache:
+    """
+    Bounded, time-limited read-through cache for patient records.
+    Entries are evicted least-recently-used once `max_entries` is reached and
+    expire `ttl_seconds` after they were loaded. Cached records are shared
+    between callers and must be treated as read-only.
+
+    Writes made by other processes (CLI imports, other gunicorn workers) are
+    noticed through check_generation(), which compares a marker the writer
+    bumps and clears the cache when it has changed.
+    """
+    def __init__(self, max_entries=1024, ttl_seconds=60.0, generation_check_seconds=1.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.generation_check_seconds = generation_check_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+        self._generation_checked_at = float("-inf")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get_or_load(self, patient_id, loader):
+        """Returns the cached record for `patient_id`, calling `loader()` on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(patient_id)
+            if entry is not None:
+                loaded_at, record = entry
+                if now - loaded_at < self.ttl_seconds:
+                    self._entries.move_to_end(patient_id)
+                    self.hits += 1
+                    return record
+                del self._entries[patient_id]
+                self.expirations += 1
+            self.misses += 1
+
+        record = loader()
+        # Missing patients are not cached so a newly inserted row shows up immediately.
+        if record is not None:
+            with self._lock:
+                self._entries[patient_id] = (now, record)
+                self._entries.move_to_end(patient_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return record
+
+    def get_many_or_load(self, patient_ids, loader):
+        """
+        Returns {patient_id: record or None} for several patients, calling
+        `loader(missing_ids)` once with every miss. The loader returns a dict
+        that omits patients that do not exist.
+        """
+        now = time.monotonic()
+        records = {}
+        missing = []
+        with self._lock:
+            for patient_id in dict.fromkeys(patient_ids):
+                entry = self._entries.get(patient_id)
+                if entry is not None and now - entry[0] < self.ttl_seconds:
+                    self._entries.move_to_end(patient_id)
+                    self.hits += 1
+                    records[patient_id] = entry[1]
+                    continue
+                if entry is not None:
+                    del self._entries[patient_id]
+                    self.expirations += 1
+                self.misses += 1
+                missing.append(patient_id)
+
+        if missing:
+            loaded = loader(missing)
+            with self._lock:
+                for patient_id in missing:
+                    record = records[patient_id] = loaded.get(patient_id)
+                    if record is not None:
+                        self._entries[patient_id] = (now, record)
+                        self._entries.move_to_end(patient_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return records
+
+    def check_generation(self, load_generation):
+        """
+        Clears every entry when `load_generation()` returns something other
+        than last time. The loader is called at most once per
+        `generation_check_seconds`; a None result means there is no marker.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._generation_checked_at < self.generation_check_seconds:
+                return
+            self._generation_checked_at = now
+        generation = load_generation()
+        if generation is None:
+            return
+        with self._lock:
+            if generation != self._generation:
+                if self._generation is not None:
+                    self.invalidations += len(self._entries)
+                    self._entries.clear()
+                self._generation = generation
+
+    def stats(self):
+        """Returns hit-rate metrics and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
@@ -0,0 +1,72 @@
+import re
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Credentials and titles that appear in names but never identify a provider on their own.
+_IGNORED_TOKENS = {"dr", "md", "fnp", "phd", "np", "do", "pa", "rn"}
+
+def tokenize(text):
+    """Lowercases text and splits it into alphanumeric word tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+# How strongly a token identifies a provider; a full name is both bits.
+_FIRST_NAME = 1
+_LAST_NAME = 2
+
+class ProviderMentionMatcher:
+    """
+    Token-indexed lookup from name parts and aliases to provider IDs.
+    The index is built once; matching a prompt is a single pass over its
+    tokens, so cost grows with the prompt, not the size of the directory,
+    and name fragments inside other words no longer match.
+
+    First names are shared by many providers in a large directory, so hits
+    are ranked: full name, then last name or alias, then first name only.
+    First-name-only hits are dropped when a stronger match exists, and at
+    most `max_results` providers are returned.
+    """
+    def __init__(self, providers, min_token_length=3, max_results=5):
+        self.min_token_length = min_token_length
+        self.max_results = max_results
+        self._index = {}
+        self._order = {}
+        for position, provider in enumerate(providers):
+            provider_id = provider.get("provider_id")
+            if not provider_id:
+                continue
+            self._order.setdefault(provider_id, position)
+            name = provider.get("name", "")
+            if "," in name:
+                last, first = name.split(",", 1)
+            else:
+                parts = name.rsplit(" ", 1)
+                first, last = (parts[0], parts[1]) if len(parts) == 2 else ("", name)
+            self._add(provider_id, first, _FIRST_NAME)
+            self._add(provider_id, last, _LAST_NAME)
+            for alias in provider.get("aliases", []):
+                self._add(provider_id, alias, _LAST_NAME)
+
+    def _add(self, provider_id, text, kind):
+        for token in tokenize(text):
+            if len(token) >= self.min_token_length and token not in _IGNORED_TOKENS:
+                entries = self._index.setdefault(token, {})
+                entries[provider_id] = entries.get(provider_id, 0) | kind
+
+    def match(self, text, ignore=()):
+        """
+        Returns the IDs of providers mentioned in `text`, strongest match
+        first, then in directory order. Tokens in `ignore` (e.g. the current
+        patient's name) never count as a mention.
+        """
+        ignored = {token for value in ignore if value for token in tokenize(value)}
+        hits = {}
+        for token in set(tokenize(text)) - ignored:
+            for provider_id, kind in self._index.get(token, {}).items():
+                hits[provider_id] = hits.get(provider_id, 0) | kind
+        if not hits:
+            return []
+        # 3 = first and last name, 2 = last name or alias, 1 = first name only.
+        scores = {provider_id: 3 if kind == _FIRST_NAME | _LAST_NAME else kind for provider_id, kind in hits.items()}
+        if max(scores.values()) > _FIRST_NAME:
+            scores = {provider_id: score for provider_id, score in scores.items() if score > _FIRST_NAME}
+        ranked = sorted(scores, key=lambda provider_id: (-scores[provider_id], self._order[provider_id]))
+        return ranked[:self.max_results]
@@ -0,0 +1,115 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from core.embedding_cache import normalize_text
+
+class ResponseCache:
+    """
+    Bounded cache of chat answers. Entries live in a scope, the fingerprint of
+    everything the model saw besides the question (patient record, retrieved
+    hospital context, enrichment), so a changed patient row or data sheet simply
+    stops matching. The scope is the only invalidation mechanism: it holds in
+    every worker process without coordination, and stale entries age out
+    through the LRU bound and TTL. Within a scope a prompt matches exactly after normalization,
+    or, when `similarity_threshold` is set, by cosine similarity of its embedding.
+    """
+    def __init__(self, max_entries=2048, ttl_seconds=3600.0, similarity_threshold=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()
+        # scope -> {key: prompt vector}, for the similarity search within a scope
+        self._scopes = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_scope(patient_id, context):
+        """Fingerprints the context an answer was generated from."""
+        digest = hashlib.sha256(context.encode("utf-8")).hexdigest()
+        return f"{patient_id}:{digest}"
+
+    @staticmethod
+    def make_key(scope, prompt):
+        return hashlib.sha256(f"{scope}\x00{normalize_text(prompt)}".encode("utf-8")).hexdigest()
+
+    def get(self, scope, prompt, prompt_vector=None):
+        """Returns the cached answer for `prompt` within `scope`, or None."""
+        key = self.make_key(scope, prompt)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live_entry(key, now)
+            if entry is None and prompt_vector is not None and self.similarity_threshold is not None:
+                key = self._most_similar(scope, prompt_vector)
+                entry = self._live_entry(key, now) if key is not None else None
+                if entry is not None:
+                    self.similar_hits += 1
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["answer"]
+
+    def put(self, scope, prompt, answer, prompt_vector=None):
+        """Stores an answer, evicting the least recently used entries beyond `max_entries`."""
+        key = self.make_key(scope, prompt)
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = {"scope": scope, "answer": answer, "stored_at": time.monotonic()}
+            self._scopes.setdefault(scope, {})[key] = _unit(prompt_vector) if prompt_vector is not None else None
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def stats(self):
+        """Returns hit-rate metrics and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+    def _live_entry(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None and now - entry["stored_at"] >= self.ttl_seconds:
+            self._discard(key)
+            return None
+        return entry
+
+    def _most_similar(self, scope, prompt_vector):
+        query = _unit(prompt_vector)
+        best_key, best_score = None, self.similarity_threshold
+        for key, vector in self._scopes.get(scope, {}).items():
+            if vector is None:
+                continue
+            score = sum(a * b for a, b in zip(query, vector))
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._scopes.get(entry["scope"])
+        if keys is not None:
+            keys.pop(key, None)
+            if not keys:
+                del self._scopes[entry["scope"]]
+
+def _unit(vector):
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
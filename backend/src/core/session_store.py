@@ -0,0 +1,151 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+class SessionStore:
+    """
+    Conversation sessions for follow-up questions about one patient. Each
+    session is a JSON document holding its turns: the prompt, the context sent
+    with it, the answer, and which documents and providers that context covered.
+    Sessions live in a small SQLite file so every worker process sees them.
+
+    Storage is bounded three ways: sessions idle for `idle_seconds` expire, a
+    session over `max_turns` or `max_session_bytes` drops its oldest follow-ups
+    (the first turn, which carries the patient record, is kept), and the least
+    recently used sessions are evicted once all sessions exceed `max_bytes`.
+    Concurrent follow-ups on the same session are not merged; the last one wins.
+    """
+    def __init__(self, db_path, max_bytes=64 * 1024 * 1024, max_session_bytes=256 * 1024,
+                 max_turns=20, idle_seconds=1800):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.max_session_bytes = max_session_bytes
+        self.max_turns = max_turns
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._connect()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, patient_id INTEGER NOT NULL, state TEXT NOT NULL, "
+            "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_last_used ON sessions (last_used)")
+        self._conn.commit()
+
+    def _connect(self):
+        self._pid = os.getpid()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+    def _ensure_process_local(self):
+        """SQLite connections must not cross a fork; a forked worker reopens the store."""
+        if self._pid != os.getpid():
+            self._connect()
+
+    def create(self, patient_id):
+        """Starts an empty session for a patient and returns it."""
+        session = {"id": uuid.uuid4().hex, "patient_id": patient_id, "created_at": time.time(), "turns": []}
+        self.save(session)
+        with self._lock:
+            self.created += 1
+        return session
+
+    def get(self, session_id):
+        """Returns a session, or None if it does not exist or has been idle too long."""
+        now = time.time()
+        with self._lock:
+            self._ensure_process_local()
+            row = self._conn.execute(
+                "SELECT state, last_used FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.idle_seconds:
+                self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                self._conn.commit()
+                self.expired += 1
+                return None
+        return json.loads(row[0])
+
+    def save(self, session):
+        """Writes a session back, trimming it to the per-session limits first."""
+        turns = session["turns"]
+        state = json.dumps(session, separators=(",", ":"))
+        while len(turns) > 1 and (len(turns) > self.max_turns or len(state) > self.max_session_bytes):
+            del turns[1]
+            state = json.dumps(session, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            self._ensure_process_local()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, patient_id, state, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (session["id"], session["patient_id"], state, len(state), now),
+            )
+            self._expire_idle(now)
+            self._evict()
+            self._conn.commit()
+
+    def delete(self, session_id):
+        """Ends a session. Returns False if it did not exist."""
+        with self._lock:
+            self._ensure_process_local()
+            deleted = self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount
+            self._conn.commit()
+        return deleted > 0
+
+    def stats(self):
+        """Returns the number and total size of live sessions and eviction counters."""
+        with self._lock:
+            self._ensure_process_local()
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions").fetchone()
+            return {
+                "sessions": count,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+                "created": self.created,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
+
+    @staticmethod
+    def sent_documents(session):
+        """Documents already given to the model in the session's remaining turns."""
+        return {document for turn in session["turns"] for document in turn.get("documents", [])}
+
+    @staticmethod
+    def resolved_providers(session):
+        """Providers whose status, rules and referral location are already in the session."""
+        return {provider_id for turn in session["turns"] for provider_id in turn.get("providers", [])}
+
+    def _expire_idle(self, now):
+        expired = self._conn.execute(
+            "DELETE FROM sessions WHERE last_used < ?", (now - self.idle_seconds,)
+        ).rowcount
+        self.expired += expired
+
+    def _evict(self):
+        """Deletes least recently used sessions until all of them fit in `max_bytes`."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM sessions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = []
+        for session_id, size in self._conn.execute("SELECT id, size FROM sessions ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            freed.append((session_id,))
+            total -= size
+        self._conn.executemany("DELETE FROM sessions WHERE id = ?", freed)
+        self.evicted += len(freed)
+        logger.info(f"Evicted {len(freed)} conversation sessions over the storage limit.")
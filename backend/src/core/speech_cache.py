@@ -0,0 +1,148 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+class SpeechCache:
+    """
+    Content-addressed on-disk cache of synthesized audio, keyed by
+    (model, voice, text). Files are named by their key, which doubles as the
+    HTTP ETag. Reads bump a file's mtime and the least recently used files are
+    deleted once the directory exceeds `max_bytes`. Concurrent requests for the
+    same key within a process share one synthesis.
+    """
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, wait_timeout=120.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        os.makedirs(directory, exist_ok=True)
+        self._bytes = self._scan()[1]
+
+    @staticmethod
+    def make_key(model, voice, text):
+        return hashlib.sha256(f"{model}\0{voice}\0{text}".encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def lookup(self, key):
+        """Returns the cached file's path, or None. A hit counts as a use for LRU eviction."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def get_or_create(self, key, synthesize):
+        """
+        Returns the path of the cached audio for `key`, calling `synthesize()`
+        (an iterable of byte chunks) on a miss. Callers that arrive while the
+        same key is being synthesized wait for that result instead.
+        """
+        while True:
+            path = self.lookup(key)
+            if path is not None:
+                with self._lock:
+                    self.hits += 1
+                return path
+            with self._lock:
+                done = self._in_flight.get(key)
+                leader = done is None
+                if leader:
+                    done = self._in_flight[key] = threading.Event()
+                    self.misses += 1
+                else:
+                    self.coalesced += 1
+            if not leader:
+                # If the leader failed, the file is still missing and the next pass retries.
+                done.wait(self.wait_timeout)
+                path = self.lookup(key)
+                if path is not None:
+                    return path
+                continue
+            try:
+                return self._store(key, synthesize())
+            finally:
+                with self._lock:
+                    self._in_flight.pop(key, None)
+                done.set()
+
+    def stats(self):
+        """Returns hit/miss counters and the approximate directory size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _store(self, key, chunks):
+        """Writes chunks to a temporary file and moves it into place, so readers never see partial audio."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    size += len(chunk)
+            path = self.path_for(key)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        with self._lock:
+            self._bytes += size
+            over_budget = self._bytes > self.max_bytes
+        if over_budget:
+            self._evict(keep=path)
+        return path
+
+    def _scan(self):
+        """Returns ([(mtime, size, path)], total bytes) for the cached files on disk."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".mp3"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+        return entries, total
+
+    def _evict(self, keep=None):
+        """Deletes least recently used files, other than `keep`, until the directory fits its budget."""
+        # Other worker processes write here too, so re-read the directory rather than trusting the counter.
+        entries, total = self._scan()
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        with self._lock:
+            self._bytes = total
+        if removed:
+            logger.info(f"Evicted {removed} files from the speech cache.")
@@ -1,18 +1,26 @@
 import chromadb
 from chromadb.utils import embedding_functions
+import hashlib
 import json
 import logging
+import os
+
+from core.embedding_cache import EmbeddingCache
+from core.metrics import span
+from core.vector_index import NumpyVectorIndex
 
 # Get a logger specific to this module
 logger = logging.getLogger(__name__)
 class VectorDataManager:
     """
-    Manages the vector database (ChromaDB) for semantic search.
+    Manages the vector database for semantic search.
     Handles creating embeddings and querying for relevant context.
+    The store is ChromaDB by default, or an in-process NumPy index when
+    VECTOR_BACKEND is set to "numpy".
     """
-    def __init__(self, app_config):
+    def __init__(self, app_config, sync_index=True):
         self.config = app_config
-        self.client = chromadb.PersistentClient(path=self.config['VECTOR_DB_PATH'])
+        self.backend = self.config.get('VECTOR_BACKEND', 'chroma')
         self.collection_name = self.config['VECTOR_DB_COLLECTION_NAME']
 
         # Set the embedding function for the collection to ensure consistency.
@@ -20,33 +28,99 @@ class VectorDataManager:
             api_key=self.config['OPENAI_API_KEY'], # Ensure this is passed from app_config
             model_name=self.config['EMBEDDING_MODEL']
         )
-        self.collection = self.client.get_or_create_collection(
-            name=self.collection_name,
-            embedding_function=openai_ef
+        self.embedding_function = openai_ef
+        self.embedding_model = self.config['EMBEDDING_MODEL']
+        self.embedding_cache = EmbeddingCache(
+            db_path=self.config.get('EMBEDDING_CACHE_PATH') or os.path.join(self.config['VECTOR_DB_PATH'], 'embedding_cache.sqlite3'),
+            memory_max_bytes=self.config.get('EMBEDDING_CACHE_MEMORY_BYTES', 16 * 1024 * 1024),
+            disk_max_bytes=self.config.get('EMBEDDING_CACHE_DISK_BYTES', 256 * 1024 * 1024)
         )
-        self._index_hospital_data(self.config['DATA_SHEET_PATH'])
+        if self.backend == 'numpy':
+            self.client = None
+            self.collection = NumpyVectorIndex(os.path.join(self.config['VECTOR_DB_PATH'], self.collection_name))
+        elif self.backend == 'chroma':
+            self.client = chromadb.PersistentClient(path=self.config['VECTOR_DB_PATH'])
+            self.collection = self.client.get_or_create_collection(
+                name=self.collection_name,
+                embedding_function=openai_ef
+            )
+        else:
+            raise ValueError(f"Unknown VECTOR_BACKEND: {self.backend}")
+        if sync_index:
+            self._index_hospital_data(self.config['DATA_SHEET_PATH'])
 
-    def _index_hospital_data(self, data_sheet_path):
+    def _index_hospital_data(self, data_sheet_path, force=False):
         """
-        Loads hospital data, creates embeddings, and stores them in ChromaDB.
-        This process is idempotent: it won't re-index if data already exists.
+        Loads hospital data and brings the vector store in sync with it incrementally.
+        Every document has a stable ID and a content hash, so only new or
+        changed documents are embedded and upserted, and documents that no
+        longer exist in the data sheet are deleted. Returns a summary dict.
         """
-        if self.collection.count() > 0:
-            logger.info("ChromaDB collection is already populated. Skipping indexing.")
-            return
-
-        logger.info("Indexing hospital data into ChromaDB...")
+        logger.info(f"Syncing hospital data into the {self.backend} vector store...")
         try:
             with open(data_sheet_path, 'r') as f:
                 hospital_data = json.load(f)
         except (FileNotFoundError, json.JSONDecodeError) as e:
             logger.error(f"Could not load or parse data_sheet.json: {e}")
-            return
+            return None
+
+        documents = self._build_documents(hospital_data)
+        existing = self.collection.get(include=["metadatas"])
+        existing_hashes = {
+            doc_id: (metadata or {}).get("content_hash")
+            for doc_id, metadata in zip(existing["ids"], existing["metadatas"])
+        }
+
+        changed = [
+            doc for doc in documents
+            if force or existing_hashes.get(doc["id"]) != doc["metadata"]["content_hash"]
+        ]
+        current_ids = {doc["id"] for doc in documents}
+        removed = [doc_id for doc_id in existing_hashes if doc_id not in current_ids]
+
+        batch_size = self.config.get('EMBEDDING_BATCH_SIZE', 100)
+        for start in range(0, len(changed), batch_size):
+            batch = changed[start:start + batch_size]
+            texts = [doc["text"] for doc in batch]
+            # Embed through the shared cache so unchanged text never hits the network again.
+            self.collection.upsert(
+                ids=[doc["id"] for doc in batch],
+                documents=texts,
+                embeddings=self.embed_texts(texts),
+                metadatas=[doc["metadata"] for doc in batch]
+            )
+            logger.info(f"Indexed {min(start + batch_size, len(changed))}/{len(changed)} changed documents.")
+
+        if removed:
+            self.collection.delete(ids=removed)
+        if self.backend == 'numpy':
+            # Written once here rather than per batch (Chroma persists on every call).
+            self.collection.flush()
+
+        summary = {
+            "total": len(documents),
+            "upserted": len(changed),
+            "deleted": len(removed),
+            "unchanged": len(documents) - len(changed)
+        }
+        logger.info(f"Vector store sync complete: {summary}")
+        return summary
+
+    def reindex(self, force=False):
+        """Re-syncs the collection with the configured data sheet. `force` re-upserts every document."""
+        return self._index_hospital_data(self.config['DATA_SHEET_PATH'], force=force)
 
+    @staticmethod
+    def _build_documents(hospital_data):
+        """
+        Turns the hospital data sheet into indexable documents, each a dict
+        with a stable `id`, the document `text` and its `metadata`.
+        """
         documents = []
-        metadatas = []
-        ids = []
-        doc_id = 1
+
+        def add(doc_id, text, metadata):
+            metadata = dict(metadata, content_hash=hashlib.sha256(text.encode("utf-8")).hexdigest())
+            documents.append({"id": doc_id, "text": text, "metadata": metadata})
 
         # Index each provider from the directory as a separate document
         for provider in hospital_data.get("ProviderDirectory", []):
@@ -55,36 +129,53 @@ class VectorDataManager:
             for dept in provider.get('departments', []):
                 department_details.append(f"Department: {dept.get('name')}, Address: {dept.get('address')}, Hours: {dept.get('hours')}")
             doc_text = f"Provider Information for {provider['name']}: Specialty is {provider['specialty']}. Practice locations and hours are: {'; '.join(department_details)}"
-            documents.append(doc_text)
-            metadatas.append({"source": "ProviderDirectory", "provider_name": provider['name']})
-            ids.append(f"provider_{doc_id}")
-            doc_id += 1
+            add(provider['provider_id'], doc_text, {
+                "source": "ProviderDirectory",
+                "provider_name": provider['name'],
+                "provider_id": provider['provider_id']
+            })
 
         # Index other general rules and policies as documents
-        documents.append(f"Appointment Rules: {json.dumps(hospital_data.get('Appointments'))}")
-        metadatas.append({"source": "Appointments"})
-        ids.append(f"doc_{doc_id}"); doc_id += 1
-
-        documents.append(f"Accepted Insurances: {', '.join(hospital_data.get('AcceptedInsurances', []))}")
-        metadatas.append({"source": "AcceptedInsurances"})
-        ids.append(f"doc_{doc_id}"); doc_id += 1
+        add("policy_appointments", f"Appointment Rules: {json.dumps(hospital_data.get('Appointments'))}", {"source": "Appointments"})
+        add("policy_accepted_insurances", f"Accepted Insurances: {', '.join(hospital_data.get('AcceptedInsurances', []))}", {"source": "AcceptedInsurances"})
+        add("policy_self_pay", f"Self-Pay Rates: {json.dumps(hospital_data.get('SelfPay'))}", {"source": "SelfPay"})
+        return documents
 
-        documents.append(f"Self-Pay Rates: {json.dumps(hospital_data.get('SelfPay'))}")
-        metadatas.append({"source": "SelfPay"})
-        ids.append(f"doc_{doc_id}"); doc_id += 1
+    def embed_texts(self, texts):
+        """Embeds texts via the embedding cache, calling OpenAI only for cache misses."""
+        return self.embedding_cache.embed(self.embedding_model, list(texts), self.embedding_function)
 
-        # Add all created documents to the collection. ChromaDB handles embedding.
-        self.collection.add(documents=documents, metadatas=metadatas, ids=ids)
-        logger.info(f"Successfully indexed {len(documents)} documents into ChromaDB.")
+    def query_relevant_documents(self, user_prompt, n_results=3, where=None):
+        """
+        Takes a user prompt and queries the vector store for the most
+        semantically similar documents, returned as a list, most relevant first.
+        `where` optionally filters on metadata, e.g. {"source": "ProviderDirectory"}.
+        """
+        # Repeated prompts are served from the embedding cache instead of re-embedding.
+        with span("embed_query"):
+            query_embedding = self.embed_texts([user_prompt])[0]
+        with span("vector_query"):
+            results = self.collection.query(
+                query_embeddings=[query_embedding],
+                n_results=n_results,
+                where=where
+            )
+        return results['documents'][0]
 
-    def query_relevant_context(self, user_prompt, n_results=3):
+    def query_relevant_documents_many(self, user_prompts, n_results=3, where=None):
         """
-        Takes a user prompt and queries ChromaDB
-        to find the most semantically similar documents.
+        Batched query_relevant_documents: embeds every prompt in one call
+        (cache misses only) and runs a single vector query. Returns one list
+        of documents per prompt.
         """
-        # The user_prompt is automatically converted to a vector for querying.
-        results = self.collection.query(
-            query_texts=[user_prompt],
-            n_results=n_results
-        )
-        return "\n".join(results['documents'][0])
\ No newline at end of file
+        if not user_prompts:
+            return []
+        with span("embed_query"):
+            query_embeddings = self.embed_texts(user_prompts)
+        with span("vector_query"):
+            results = self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=where
+            )
+        return results['documents']
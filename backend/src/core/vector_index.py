@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+
+import numpy as np
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+class NumpyVectorIndex:
+    """
+    In-process exact vector index stored as a memory-mapped float32 `.npy`
+    matrix of L2-normalized embeddings plus a JSON metadata sidecar.
+
+    It implements the subset of the Chroma collection API that
+    VectorDataManager uses (count, get, upsert, delete, query), so the two
+    backends are interchangeable. Distances are squared L2 between
+    normalized vectors, which is what Chroma's default "l2" space reports
+    for unit-length embeddings such as OpenAI's.
+
+    Upserts and deletes are applied to an in-memory buffer, which is
+    visible to queries at once. Nothing is written to disk until flush() is
+    called, once at the end of a sync. The buffer's capacity doubles as
+    it fills, so adding N vectors over many batches copies O(N) rows in
+    total instead of rewriting the whole matrix for every batch.
+    """
+    MATRIX_FILE = "embeddings.npy"
+    METADATA_FILE = "metadata.json"
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._ids = []
+        self._documents = []
+        self._metadatas = []
+        self._matrix = None
+        # Writable copy of the matrix with spare rows, present while there are unsaved changes.
+        self._buffer = None
+        self._dirty = False
+        self._positions = {}
+        self._mask_cache = {}
+        self._load()
+
+    def _load(self):
+        matrix_path = os.path.join(self.path, self.MATRIX_FILE)
+        metadata_path = os.path.join(self.path, self.METADATA_FILE)
+        if not (os.path.exists(matrix_path) and os.path.exists(metadata_path)):
+            return
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            sidecar = json.load(f)
+        self._ids = sidecar["ids"]
+        self._documents = sidecar["documents"]
+        self._metadatas = sidecar["metadatas"]
+        # Memory-map the matrix so pages are shared across workers and loaded on demand.
+        self._matrix = np.load(matrix_path, mmap_mode='r')
+        self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        logger.info(f"Loaded {len(self._ids)} vectors from {self.path}")
+
+    def _save(self, matrix):
+        """Writes the matrix and sidecar atomically, then re-opens the matrix as a memory map."""
+        matrix_tmp = os.path.join(self.path, "embeddings.tmp.npy")
+        metadata_tmp = os.path.join(self.path, "metadata.tmp.json")
+        np.save(matrix_tmp, matrix)
+        with open(metadata_tmp, 'w', encoding='utf-8') as f:
+            json.dump({"ids": self._ids, "documents": self._documents, "metadatas": self._metadatas}, f)
+        os.replace(matrix_tmp, os.path.join(self.path, self.MATRIX_FILE))
+        os.replace(metadata_tmp, os.path.join(self.path, self.METADATA_FILE))
+        self._matrix = np.load(os.path.join(self.path, self.MATRIX_FILE), mmap_mode='r')
+        self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        self._mask_cache = {}
+
+    def count(self):
+        return len(self._ids)
+
+    def get(self, ids=None, include=("metadatas", "documents")):
+        """Returns stored ids plus the requested fields, optionally limited to `ids`."""
+        positions = range(len(self._ids)) if ids is None else [self._positions[i] for i in ids if i in self._positions]
+        result = {"ids": [self._ids[i] for i in positions]}
+        if "metadatas" in include:
+            result["metadatas"] = [self._metadatas[i] for i in positions]
+        if "documents" in include:
+            result["documents"] = [self._documents[i] for i in positions]
+        return result
+
+    def upsert(self, ids, documents, embeddings, metadatas):
+        """Inserts new documents and replaces existing ones with the same id. Call flush() to persist."""
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        self._reserve(len(vectors), vectors.shape[1])
+        for doc_id, document, metadata, vector in zip(ids, documents, metadatas, vectors):
+            position = self._positions.get(doc_id)
+            if position is None:
+                position = self._positions[doc_id] = len(self._ids)
+                self._ids.append(doc_id)
+                self._documents.append(document)
+                self._metadatas.append(metadata)
+            else:
+                self._documents[position] = document
+                self._metadatas[position] = metadata
+            self._buffer[position] = vector
+        self._matrix = self._buffer[:len(self._ids)]
+        self._mask_cache = {}
+        self._dirty = True
+
+    def delete(self, ids):
+        """Removes documents by id; unknown ids are ignored. Call flush() to persist."""
+        doomed = {self._positions[i] for i in ids if i in self._positions}
+        if not doomed:
+            return
+        keep = [i for i in range(len(self._ids)) if i not in doomed]
+        self._buffer = np.array(self._matrix[keep], dtype=np.float32)
+        self._matrix = self._buffer
+        self._ids = [self._ids[i] for i in keep]
+        self._documents = [self._documents[i] for i in keep]
+        self._metadatas = [self._metadatas[i] for i in keep]
+        self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        self._mask_cache = {}
+        self._dirty = True
+
+    def flush(self):
+        """Writes pending upserts and deletes to disk in one go, then re-opens the matrix as a memory map."""
+        if not self._dirty:
+            return
+        self._save(self._matrix)
+        self._buffer = None
+        self._dirty = False
+
+    def _reserve(self, rows, dim):
+        """Makes room in the writable buffer for `rows` more vectors, doubling its capacity when full."""
+        size = len(self._ids)
+        capacity = 0 if self._buffer is None else self._buffer.shape[0]
+        if self._buffer is not None and size + rows <= capacity:
+            return
+        grown = np.empty((max(size + rows, 2 * capacity, 2 * size), dim), dtype=np.float32)
+        if self._matrix is not None:
+            grown[:size] = self._matrix
+        self._buffer = grown
+
+    def query(self, query_embeddings, n_results=3, where=None):
+        """
+        Returns the `n_results` nearest documents for each query embedding in
+        Chroma's result layout. All queries are scored with one matrix product
+        and the top-k is selected with argpartition before sorting.
+        """
+        empty = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        queries = _normalize(np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1))
+        if self._matrix is None or not self._ids:
+            for key in empty:
+                empty[key] = [[] for _ in range(len(queries))]
+            return empty
+
+        candidates = self._filter_rows(where)
+        matrix = self._matrix if candidates is None else self._matrix[candidates]
+        k = min(n_results, matrix.shape[0])
+        results = {key: [] for key in empty}
+        if k == 0:
+            for key in results:
+                results[key] = [[] for _ in range(len(queries))]
+            return results
+
+        scores = queries @ matrix.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        for row, columns in zip(scores, top):
+            ordered = columns[np.argsort(-row[columns], kind="stable")]
+            positions = ordered if candidates is None else candidates[ordered]
+            results["ids"].append([self._ids[i] for i in positions])
+            results["documents"].append([self._documents[i] for i in positions])
+            results["metadatas"].append([self._metadatas[i] for i in positions])
+            results["distances"].append([float(2.0 - 2.0 * row[c]) for c in ordered])
+        return results
+
+    def _filter_rows(self, where):
+        """
+        Resolves a Chroma-style metadata filter to an array of row positions.
+        Supports equality, $eq, $ne and $in on single fields, combined with $and.
+        Resolved filters are cached until the index changes.
+        """
+        if not where:
+            return None
+        cache_key = json.dumps(where, sort_keys=True)
+        rows = self._mask_cache.get(cache_key)
+        if rows is None:
+            rows = np.flatnonzero([_matches(metadata or {}, where) for metadata in self._metadatas])
+            self._mask_cache[cache_key] = rows
+        return rows
+
+def _matches(metadata, where):
+    for field, condition in where.items():
+        if field == "$and":
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+            continue
+        value = metadata.get(field)
+        if isinstance(condition, dict):
+            for op, expected in condition.items():
+                if op == "$eq" and value != expected:
+                    return False
+                if op == "$ne" and value == expected:
+                    return False
+                if op == "$in" and value not in expected:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
@@ -1,5 +1,18 @@
 import json
 import logging
+import sqlite3
+
+APPOINTMENT_FIELDS = (
+    "date", "time", "timezone", "provider_id", "provider", "department",
+    "location_name", "location_address", "status", "reason",
+)
+REFERRAL_FIELDS = (
+    "provider_id", "name", "specialty", "department", "location_name", "location_address", "hours",
+)
+INSURANCE_FIELDS = ("payer", "plan", "member_id", "group_number")
+COVERAGES = ("primary", "secondary")
+# Patient ids per statement for bulk reads and status refreshes, well under SQLite's bound-parameter limit.
+_FETCH_BATCH = 500
 
 def create_tables(db, schema_path):
     """Creates database tables from a schema file."""
@@ -21,24 +34,283 @@ def seed_data(db, patient_sheet_path):
 
     logging.info("Seeding database with initial data...")
 
-    # Load patient data from the dedicated patient sheet
+    # Stream patient data from the dedicated patient sheet in chunked transactions
+    from patient_import import import_patients, iter_patients
     try:
-        with open(patient_sheet_path, 'r') as f:
-            patient_data = json.load(f)
-        patients_to_seed = patient_data.get("InitialPatientData", [])
+        import_patients(db, iter_patients(patient_sheet_path), mode="insert")
     except (FileNotFoundError, json.JSONDecodeError) as e:
         logging.error(f"Could not load or parse patient_sheet.json for seeding: {e}")
         return
 
-    for patient in patients_to_seed:
-        cursor.execute(
-            "INSERT INTO patients (id, name, dob, pcp, ehrId, insurance, referred_providers, appointments) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (
-                patient['id'], patient['name'], patient['dob'], patient.get('pcp'), patient.get('ehrId'),
-                json.dumps(patient.get('insurance')), json.dumps(patient.get('referred_providers')), json.dumps(patient.get('appointments')),
+    logging.info("Database seeded successfully.")
+
+def fetch_patient(db, patient_id):
+    """
+    Reads one patient from the normalized tables and reassembles it into the
+    same nested shape as patient_sheet.json. Returns None if it does not exist.
+    """
+    try:
+        patient_id = int(patient_id)
+    except (TypeError, ValueError):
+        return None
+    return fetch_patients(db, [patient_id]).get(patient_id)
+
+def fetch_patients(db, patient_ids):
+    """
+    Like fetch_patient for several patients: one `IN (...)` query per table
+    (per batch of ids) instead of one round of queries per patient. Returns
+    {id: record}, leaving out patients that do not exist.
+    """
+    patient_ids = list(dict.fromkeys(int(patient_id) for patient_id in patient_ids if str(patient_id).isdigit()))
+    patients = {}
+    for start in range(0, len(patient_ids), _FETCH_BATCH):
+        batch = patient_ids[start:start + _FETCH_BATCH]
+        placeholders = ", ".join("?" * len(batch))
+        for row in db.execute(f"SELECT id, name, dob, pcp, ehrId FROM patients WHERE id IN ({placeholders})", batch):
+            patients[row['id']] = dict(
+                row, insurance={coverage: None for coverage in COVERAGES}, referred_providers=[], appointments=[]
             )
+        if not any(patient_id in patients for patient_id in batch):
+            continue
+
+        for ins in db.execute(
+            f"SELECT patient_id, coverage, {', '.join(INSURANCE_FIELDS)} FROM patient_insurance "
+            f"WHERE patient_id IN ({placeholders})", batch
+        ):
+            patients[ins['patient_id']]['insurance'][ins['coverage']] = {field: ins[field] for field in INSURANCE_FIELDS}
+
+        candidates = {}
+        for cand in db.execute(
+            "SELECT c.referral_id, c.provider_id, c.name FROM referral_candidates c "
+            f"JOIN referrals r ON r.id = c.referral_id WHERE r.patient_id IN ({placeholders})", batch
+        ):
+            candidates.setdefault(cand['referral_id'], []).append(
+                {"provider_id": cand['provider_id'], "name": cand['name']}
+            )
+        for ref in db.execute(
+            f"SELECT id, patient_id, {', '.join(REFERRAL_FIELDS)} FROM referrals "
+            f"WHERE patient_id IN ({placeholders}) ORDER BY id", batch
+        ):
+            referral = _without_nulls(ref, REFERRAL_FIELDS)
+            if ref['id'] in candidates:
+                referral['candidate_providers'] = candidates[ref['id']]
+            patients[ref['patient_id']]['referred_providers'].append(referral)
+
+        for appt in db.execute(
+            f"SELECT patient_id, {', '.join(APPOINTMENT_FIELDS)} FROM appointments "
+            f"WHERE patient_id IN ({placeholders}) ORDER BY id", batch
+        ):
+            patients[appt['patient_id']]['appointments'].append(_without_nulls(appt, APPOINTMENT_FIELDS))
+    return patients
+
+_STATUS_SELECT = """
+    SELECT patient_id, provider_id, MAX(last_completed), MAX(referred_department) FROM (
+        SELECT patient_id, provider_id, MAX(date) AS last_completed, NULL AS referred_department
+        FROM appointments WHERE status = 'completed' AND provider_id IS NOT NULL {appointment_filter}
+        GROUP BY patient_id, provider_id
+        UNION ALL
+        SELECT r.patient_id, r.provider_id, NULL, r.department FROM referrals r
+        WHERE r.provider_id IS NOT NULL {referral_filter} AND r.id = (
+            SELECT MIN(id) FROM referrals WHERE patient_id = r.patient_id AND provider_id = r.provider_id
         )
-    
+    ) GROUP BY patient_id, provider_id
+"""
+
+def refresh_provider_status(db, patient_ids=None):
+    """
+    Recomputes the materialized patient_provider_status rows (latest
+    completed appointment and first referred department per provider) for
+    the given patients, or for every patient if `patient_ids` is None. The
+    caller is responsible for committing.
+    """
+    insert = "INSERT INTO patient_provider_status (patient_id, provider_id, last_completed, referred_department) "
+    if patient_ids is None:
+        db.execute("DELETE FROM patient_provider_status")
+        db.execute(insert + _STATUS_SELECT.format(appointment_filter="", referral_filter=""))
+        return
+    patient_ids = list(patient_ids)
+    for start in range(0, len(patient_ids), _FETCH_BATCH):
+        batch = patient_ids[start:start + _FETCH_BATCH]
+        placeholders = ", ".join("?" * len(batch))
+        db.execute(f"DELETE FROM patient_provider_status WHERE patient_id IN ({placeholders})", batch)
+        db.execute(
+            insert + _STATUS_SELECT.format(
+                appointment_filter=f"AND patient_id IN ({placeholders})",
+                referral_filter=f"AND r.patient_id IN ({placeholders})"
+            ),
+            batch * 2
+        )
+
+def fetch_provider_status(db, patient_id, provider_ids):
+    """
+    Returns {provider_id: {"last_completed", "referred_department"}} for the
+    providers that have a patient_provider_status row, in one primary-key lookup.
+    """
+    if not provider_ids:
+        return {}
+    placeholders = ", ".join("?" * len(provider_ids))
+    return {
+        row['provider_id']: {"last_completed": row['last_completed'], "referred_department": row['referred_department']}
+        for row in db.execute(
+            "SELECT provider_id, last_completed, referred_department FROM patient_provider_status "
+            f"WHERE patient_id = ? AND provider_id IN ({placeholders})",
+            (patient_id, *provider_ids)
+        )
+    }
+
+def ensure_provider_status(db):
+    """
+    Creates and fills the patient_provider_status table on databases created
+    before it existed. Returns True if the table had to be created.
+    """
+    exists = db.execute("SELECT 1 FROM sqlite_master WHERE name = 'patient_provider_status'").fetchone()
+    if exists:
+        return False
+    logging.info("Creating materialized patient provider status...")
+    db.execute("""
+        CREATE TABLE patient_provider_status (
+            patient_id INTEGER NOT NULL REFERENCES patients (id) ON DELETE CASCADE,
+            provider_id TEXT NOT NULL,
+            last_completed TEXT,
+            referred_department TEXT,
+            PRIMARY KEY (patient_id, provider_id)
+        ) WITHOUT ROWID
+    """)
+    refresh_provider_status(db)
     db.commit()
-    logging.info("Database seeded successfully.")
\ No newline at end of file
+    return True
+
+def fetch_patient_generation(db):
+    """Returns the patient data generation, or 0 on databases created before it existed."""
+    try:
+        row = db.execute("SELECT generation FROM patient_data_generation WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] if row else 0
+
+def bump_patient_generation(db):
+    """
+    Marks patient data as changed after a bulk write, so every process
+    drops its cached patient records on its next lookup. Commits.
+    """
+    db.execute("CREATE TABLE IF NOT EXISTS patient_data_generation "
+               "(id INTEGER PRIMARY KEY CHECK (id = 1), generation INTEGER NOT NULL)")
+    db.execute("INSERT INTO patient_data_generation (id, generation) VALUES (1, 1) "
+               "ON CONFLICT (id) DO UPDATE SET generation = generation + 1")
+    db.commit()
+
+def search_patients(db, after_id=0, limit=100, name_query=None, pcp=None, payer=None):
+    """
+    Returns up to `limit` patient summaries with id > `after_id`, in id order
+    (keyset pagination). `name_query` is a prefix search over name words,
+    e.g. "jo do" matches "John Doe"; `pcp` and `payer` are exact filters.
+    """
+    clauses = ["p.id > ?"]
+    params = [after_id]
+    if name_query:
+        terms = [term for term in name_query.replace('"', ' ').split() if term]
+        if terms:
+            clauses.append("p.id IN (SELECT rowid FROM patients_fts WHERE patients_fts MATCH ?)")
+            params.append(" AND ".join(f'"{term}"*' for term in terms))
+    if pcp:
+        clauses.append("p.pcp = ?")
+        params.append(pcp)
+    if payer:
+        clauses.append("EXISTS (SELECT 1 FROM patient_insurance i WHERE i.patient_id = p.id AND i.payer = ?)")
+        params.append(payer)
+    sql = f"SELECT p.id, p.name FROM patients p WHERE {' AND '.join(clauses)} ORDER BY p.id"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return db.execute(sql, params).fetchall()
+
+def ensure_search_index(db):
+    """
+    Creates the patient name FTS index and its triggers on databases created
+    before it existed, and rebuilds it from the patients table. Returns True
+    if the index had to be created.
+    """
+    exists = db.execute("SELECT 1 FROM sqlite_master WHERE name = 'patients_fts'").fetchone()
+    if exists:
+        return False
+    logging.info("Creating patient name search index...")
+    db.executescript("""
+        CREATE VIRTUAL TABLE patients_fts USING fts5 (name, content='patients', content_rowid='id', prefix='2 3');
+        CREATE TRIGGER patients_fts_insert AFTER INSERT ON patients BEGIN
+            INSERT INTO patients_fts (rowid, name) VALUES (new.id, new.name);
+        END;
+        CREATE TRIGGER patients_fts_delete AFTER DELETE ON patients BEGIN
+            INSERT INTO patients_fts (patients_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        END;
+        CREATE TRIGGER patients_fts_update AFTER UPDATE OF name ON patients BEGIN
+            INSERT INTO patients_fts (patients_fts, rowid, name) VALUES ('delete', old.id, old.name);
+            INSERT INTO patients_fts (rowid, name) VALUES (new.id, new.name);
+        END;
+        CREATE INDEX IF NOT EXISTS idx_patients_pcp ON patients (pcp, id);
+        CREATE INDEX IF NOT EXISTS idx_patient_insurance_payer ON patient_insurance (payer, patient_id);
+        INSERT INTO patients_fts (patients_fts) VALUES ('rebuild');
+    """)
+    db.commit()
+    return True
+
+def migrate_blob_schema(db, schema_path, batch_size=5000):
+    """
+    Migrates a database created with the old layout, where insurance,
+    referred_providers and appointments were JSON TEXT columns on `patients`,
+    to the normalized tables. The rename, copy and drop run in one
+    transaction, so a failure leaves the old table untouched, and legacy rows
+    are read and written `batch_size` at a time. Returns the number of
+    migrated patients, or None if there was nothing to migrate.
+    """
+    # patient_import imports this module at load time.
+    from patient_import import write_patient_chunk
+
+    if 'appointments' not in {row[1] for row in db.execute("PRAGMA table_info(patients)")}:
+        ensure_search_index(db)
+        ensure_provider_status(db)
+        logging.info("Database already uses the normalized layout. Nothing to migrate.")
+        return None
+
+    migrated = 0
+    db.execute("BEGIN")
+    try:
+        logging.info("Migrating patients from JSON blob columns to normalized tables...")
+        db.execute("ALTER TABLE patients RENAME TO patients_legacy")
+        # schema.sql only drops tables that are about to be recreated, so the renamed table survives.
+        for statement in _schema_statements(schema_path):
+            db.execute(statement)
+        legacy_rows = db.execute(
+            "SELECT id, name, dob, pcp, ehrId, insurance, referred_providers, appointments FROM patients_legacy ORDER BY id"
+        )
+        while batch := legacy_rows.fetchmany(batch_size):
+            write_patient_chunk(db, [_legacy_patient(row) for row in batch])
+            migrated += len(batch)
+            logging.info(f"Migrated {migrated} patients...")
+        db.execute("DROP TABLE patients_legacy")
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    logging.info(f"Migrated {migrated} patients.")
+    return migrated
+
+def _schema_statements(schema_path):
+    """Splits a schema file into statements, so it can run inside a transaction (executescript commits first)."""
+    statement = ""
+    with open(schema_path, 'r') as f:
+        for line in f:
+            statement += line
+            if sqlite3.complete_statement(statement):
+                yield statement
+                statement = ""
+
+def _legacy_patient(row):
+    """Decodes a row of the old JSON blob layout into the patient_sheet.json shape."""
+    patient = dict(row)
+    for field in ('insurance', 'referred_providers', 'appointments'):
+        patient[field] = json.loads(patient[field]) if patient[field] else None
+    return patient
+
+def _without_nulls(row, fields):
+    """Builds a dict from a row, leaving out columns that were absent in the source JSON."""
+    return {field: row[field] for field in fields if row[field] is not None}
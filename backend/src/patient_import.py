@@ -0,0 +1,204 @@
+import json
+import logging
+import time
+
+from db_utils import APPOINTMENT_FIELDS, COVERAGES, INSURANCE_FIELDS, REFERRAL_FIELDS, refresh_provider_status
+
+MODES = ("insert", "upsert", "merge")
+
+# Pragmas relaxed for the duration of a bulk load. synchronous=NORMAL is crash-safe under WAL (a power
+# loss can only drop the last committed chunks); OFF would risk corrupting the database.
+IMPORT_PRAGMAS = {"synchronous": "NORMAL", "temp_store": "MEMORY", "cache_size": -65536}
+
+def iter_json_lines(f):
+    """Yields one patient per non-empty line of a JSON lines file."""
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number}: {e}") from e
+
+def iter_json_array(f, read_size=1 << 20):
+    """
+    Yields the objects of the first JSON array in a file without loading the
+    whole document. Accepts both a bare array and patient_sheet.json's
+    {"InitialPatientData": [...]} wrapper.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+
+    def fill():
+        nonlocal buffer, eof
+        chunk = f.read(read_size)
+        if not chunk:
+            eof = True
+        buffer += chunk
+
+    while "[" not in buffer:
+        if eof:
+            return
+        fill()
+    buffer = buffer[buffer.index("[") + 1:]
+
+    position = 0
+    while True:
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            buffer, position = buffer[position:], 0
+            fill()
+        if position >= len(buffer) or buffer[position] == "]":
+            return
+        try:
+            obj, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # The object straddles the read boundary; keep the tail and read more.
+            buffer, position = buffer[position:], 0
+            fill()
+            continue
+        yield obj
+        position = end
+        if position > read_size:
+            buffer, position = buffer[position:], 0
+
+def iter_patients(path, fmt="auto"):
+    """Streams patient records from a JSON array / patient_sheet.json document or a JSON lines file."""
+    if fmt == "auto":
+        fmt = "jsonl" if path.endswith((".jsonl", ".ndjson")) else "json"
+    with open(path, "r", encoding="utf-8") as f:
+        yield from (iter_json_lines(f) if fmt == "jsonl" else iter_json_array(f))
+
+def write_patient_chunk(db, patients, mode="insert"):
+    """
+    Writes a list of patients (patient_sheet.json shape) with executemany.
+    `insert` fails on existing ids, `upsert` replaces existing patients
+    entirely, and `merge` updates provided fields and adds appointments,
+    referrals and coverages that are not already stored. The written
+    patients' provider status rows are refreshed in the same transaction.
+    The caller commits.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown import mode: {mode}")
+    if not patients:
+        return
+    ids = [(p["id"],) for p in patients]
+    rows = [(p["id"], p["name"], p["dob"], p.get("pcp"), p.get("ehrId")) for p in patients]
+
+    if mode == "insert":
+        db.executemany("INSERT INTO patients (id, name, dob, pcp, ehrId) VALUES (?, ?, ?, ?, ?)", rows)
+    elif mode == "upsert":
+        db.executemany(
+            "INSERT INTO patients (id, name, dob, pcp, ehrId) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET name = excluded.name, dob = excluded.dob, "
+            "pcp = excluded.pcp, ehrId = excluded.ehrId", rows)
+        # Children are deleted explicitly so this does not rely on foreign_keys being enabled.
+        db.executemany(
+            "DELETE FROM referral_candidates WHERE referral_id IN (SELECT id FROM referrals WHERE patient_id = ?)", ids)
+        for table in ("patient_insurance", "appointments", "referrals"):
+            db.executemany(f"DELETE FROM {table} WHERE patient_id = ?", ids)
+    else:
+        db.executemany(
+            "INSERT INTO patients (id, name, dob, pcp, ehrId) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET name = excluded.name, dob = excluded.dob, "
+            "pcp = COALESCE(excluded.pcp, pcp), ehrId = COALESCE(excluded.ehrId, ehrId)", rows)
+
+    insurance_rows = [
+        (p["id"], coverage, *(p["insurance"][coverage].get(field) for field in INSURANCE_FIELDS))
+        for p in patients for coverage in COVERAGES if (p.get("insurance") or {}).get(coverage)
+    ]
+    db.executemany(
+        f"INSERT INTO patient_insurance (patient_id, coverage, {', '.join(INSURANCE_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?) "
+        f"ON CONFLICT (patient_id, coverage) DO UPDATE SET "
+        + ", ".join(f"{field} = excluded.{field}" for field in INSURANCE_FIELDS),
+        insurance_rows
+    )
+
+    appointment_rows = [
+        (p["id"], *(appt.get(field) for field in APPOINTMENT_FIELDS))
+        for p in patients for appt in p.get("appointments") or []
+    ]
+    columns = ", ".join(APPOINTMENT_FIELDS)
+    placeholders = ", ".join("?" * (len(APPOINTMENT_FIELDS) + 1))
+    if mode == "merge":
+        # Skip appointments already on file for the same provider, date and time.
+        # Parameter ?1 is patient_id and ?N+2 is APPOINTMENT_FIELDS[N].
+        param = {field: f"?{i + 2}" for i, field in enumerate(APPOINTMENT_FIELDS)}
+        db.executemany(
+            f"INSERT INTO appointments (patient_id, {columns}) SELECT ?1, {', '.join(param.values())} "
+            f"WHERE NOT EXISTS (SELECT 1 FROM appointments WHERE patient_id = ?1 "
+            f"AND provider_id IS {param['provider_id']} AND date IS {param['date']} AND time IS {param['time']})",
+            appointment_rows
+        )
+    else:
+        db.executemany(f"INSERT INTO appointments (patient_id, {columns}) VALUES ({placeholders})", appointment_rows)
+
+    next_referral_id = db.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM referrals").fetchone()[0]
+    referral_rows = []
+    candidate_rows = []
+    for p in patients:
+        for referral in p.get("referred_providers") or []:
+            if mode == "merge" and db.execute(
+                "SELECT 1 FROM referrals WHERE patient_id = ? AND provider_id IS ? AND department IS ?",
+                (p["id"], referral.get("provider_id"), referral.get("department"))
+            ).fetchone():
+                continue
+            referral_rows.append((next_referral_id, p["id"], *(referral.get(field) for field in REFERRAL_FIELDS)))
+            candidate_rows.extend(
+                (next_referral_id, c.get("provider_id"), c.get("name")) for c in referral.get("candidate_providers", [])
+            )
+            next_referral_id += 1
+    db.executemany(
+        f"INSERT INTO referrals (id, patient_id, {', '.join(REFERRAL_FIELDS)}) "
+        f"VALUES ({', '.join('?' * (len(REFERRAL_FIELDS) + 2))})",
+        referral_rows
+    )
+    db.executemany("INSERT INTO referral_candidates (referral_id, provider_id, name) VALUES (?, ?, ?)", candidate_rows)
+    refresh_provider_status(db, [p["id"] for p in patients])
+
+def import_patients(db, patients, mode="insert", chunk_size=5000, progress=None):
+    """
+    Loads an iterable of patients in chunked transactions with relaxed
+    pragmas, so memory stays flat regardless of input size. `progress` is
+    called with (rows_done, rows_per_second) after every chunk. Returns
+    (rows, seconds).
+    """
+    saved = {name: db.execute(f"PRAGMA {name}").fetchone()[0] for name in IMPORT_PRAGMAS}
+    for name, value in IMPORT_PRAGMAS.items():
+        db.execute(f"PRAGMA {name} = {value}")
+    started = time.perf_counter()
+    done = 0
+    chunk = []
+    try:
+        for patient in patients:
+            chunk.append(patient)
+            if len(chunk) >= chunk_size:
+                done += _commit_chunk(db, chunk, mode)
+                chunk = []
+                if progress:
+                    progress(done, done / (time.perf_counter() - started))
+        if chunk:
+            done += _commit_chunk(db, chunk, mode)
+            if progress:
+                progress(done, done / (time.perf_counter() - started))
+    finally:
+        for name, value in saved.items():
+            db.execute(f"PRAGMA {name} = {value}")
+    elapsed = time.perf_counter() - started
+    logging.info(f"Imported {done} patients in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.0f} rows/s).")
+    return done, elapsed
+
+def _commit_chunk(db, chunk, mode):
+    try:
+        write_patient_chunk(db, chunk, mode)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(chunk)
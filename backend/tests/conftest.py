@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The backend is run with src/ on the path (see the Dockerfile); do the same for the tests.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
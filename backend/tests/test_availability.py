@@ -0,0 +1,55 @@
+from datetime import date
+
+import pytest
+
+from core.availability import parse_hours, parse_requested_time
+
+# A Saturday, so "today" is 5 and "tomorrow" is 6.
+TODAY = date(2026, 10, 17)
+
+@pytest.mark.parametrize("text, expected", [
+    ("M-F 9am-5pm", ((0b0011111, 540, 1020),)),
+    ("Mon–Wed 09:00–17:00", ((0b0000111, 540, 1020),)),
+    ("Mon-Fri 9-5", ((0b0011111, 540, 1020),)),
+    ("Monday through Friday 9am to 5pm", ((0b0011111, 540, 1020),)),
+    ("Mon-Fri 8-4:30, Sat 9-12", ((0b0011111, 480, 990), (0b0100000, 540, 720))),
+    ("weekdays 1-5", ((0b0011111, 780, 1020),)),
+    ("Tu-Th 9-5pm; Sa 9am-noon", ((0b0001110, 540, 1020), (0b0100000, 540, 720))),
+    ("By appointment only", ()),
+])
+def test_parse_hours(text, expected):
+    assert parse_hours(text) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    ("Can I book House on Thursday at 3pm?", (3, 900, 901)),
+    ("Book him for Monday at 10", (0, 600, 601)),
+    ("Monday at 3", (0, 900, 901)),
+    ("Wednesday at 10:30", (2, 630, 631)),
+    ("Monday 2-4pm", (0, 840, 960)),
+    ("Tuesday between 9 and 11", (1, 540, 660)),
+    ("Monday from 1 to 3", (0, 780, 900)),
+    ("Friday morning", (4, 480, 720)),
+    ("Is Monday ok?", (0, 0, 1440)),
+    ("Is Monday ok for 2 to 3 patients?", (0, 0, 1440)),
+    ("What about today?", (5, 0, 1440)),
+    ("tomorrow around 8", (6, 480, 481)),
+    ("Can he come Thu 3pm?", (3, 900, 901)),
+    ("Sat 10am works?", (5, 600, 601)),
+    ("Is he free sat morning?", (5, 480, 720)),
+])
+def test_parse_requested_time(text, expected):
+    assert parse_requested_time(text, TODAY) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    # Ordinary words that are also day abbreviations are not days...
+    ("I sat with him monday", (0, 0, 1440)),
+    ("He was out in the sun on wednesday afternoon", (2, 720, 1020)),
+    # ...and a full day name wins over a capitalized abbreviation.
+    ("Sun was out; book him Friday at 9", (4, 540, 541)),
+])
+def test_common_words_are_not_days(text, expected):
+    assert parse_requested_time(text, TODAY) == expected
+
+@pytest.mark.parametrize("text", ["I sat with him for a while", "Was he out in the sun?", "How is the patient?"])
+def test_no_day_named(text):
+    assert parse_requested_time(text, TODAY) is None
@@ -0,0 +1,71 @@
+import pytest
+
+from core.intent_router import IntentRouter
+
+class StubDataManager:
+    """Just enough of CareDataManager for IntentRouter: one patient and no providers."""
+    hospital_data = {
+        "AcceptedInsurances": ["Medicaid", "United Health Care", "Aetna", "Cigna"],
+        "SelfPay": {"Primary Care": 150, "Orthopedics": 300},
+    }
+
+    def __init__(self, payer="Aetna"):
+        self.patient = {"name": "John Doe", "insurance": {"primary": {"payer": payer, "plan": "PPO"}}}
+
+    def get_patient_data(self, patient_id):
+        return self.patient if patient_id == 1 else None
+
+    def find_mentioned_providers(self, text, patient_name=None):
+        return []
+
+    def get_insurance_status(self, payer):
+        return payer in self.hospital_data["AcceptedInsurances"]
+
+@pytest.fixture
+def router():
+    return IntentRouter(StubDataManager())
+
+@pytest.mark.parametrize("prompt, payer", [
+    ("Is Aetna accepted?", "Aetna"),
+    ("Do you accept Cigna?", "Cigna"),
+    ("Is United Health Care in-network?", "United Health Care"),
+    ("Does the clinic take UHC?", "United Health Care"),
+    ("Is Medicaid insurance accepted here?", "Medicaid"),
+])
+def test_single_known_payer_is_answered(router, prompt, payer):
+    result = router.route(prompt, 1)
+    assert result["intent"] == "insurance"
+    assert result["response"] == f"Yes, **{payer}** is accepted."
+
+def test_patients_own_insurance_is_answered(router):
+    result = router.route("Is the patient's insurance accepted?", 1)
+    assert result["response"].startswith("John Doe's primary insurance, **Aetna** (PPO), is accepted.")
+
+def test_patients_own_unaccepted_insurance_lists_self_pay():
+    router = IntentRouter(StubDataManager(payer="Humana"))
+    response = router.route("Is his insurance accepted?", 1)["response"]
+    assert "**Humana** (PPO), is **not** accepted." in response
+    assert "- Primary Care: $150" in response
+
+@pytest.mark.parametrize("prompt", [
+    # Several payers.
+    "Are Aetna and Medicare accepted?",
+    "Is Aetna or Humana accepted?",
+    "Are Aetna, Cigna accepted?",
+    # Several questions.
+    "Does Cigna cover his MRI, and is Medicare accepted too?",
+    "Is Aetna accepted and what is the copay?",
+    # Negations.
+    "Is Aetna not accepted?",
+    "Isn't Cigna accepted?",
+    "Don't you take Aetna?",
+    # Text outside the narrow pattern.
+    "Is Aetna accepted for his knee surgery?",
+    "I think Aetna is accepted?",
+    "Is Medicare accepted?",
+])
+def test_ambiguous_insurance_questions_defer_to_llm(router, prompt):
+    assert router.route(prompt, 1) is None
+
+def test_unknown_patient_defers_to_llm(router):
+    assert router.route("Is Aetna accepted?", 2) is None
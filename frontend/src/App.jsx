@@ -66,6 +66,8 @@ function PatientSnapshot({ patient }) {
 function App() {
   const [patients, setPatients] = useState([])
   const [selectedPatientId, setSelectedPatientId] = useState('')
+  const [patientQuery, setPatientQuery] = useState('')
+  const [nextCursor, setNextCursor] = useState(null)
   const [messages, setMessages] = useState([])
   const [inputMessage, setInputMessage] = useState('')
   const [isRecording, setIsRecording] = useState(false)
@@ -77,15 +79,38 @@ function App() {
   const chatEndRef = useRef(null)
   const currentAudioRef = useRef(null)
 
-  // Load patients on mount
+  // GET /patients returns one page at a time; the cursor for the next page comes in X-Next-Cursor
+  const fetchPatients = (query, afterId) =>
+    axios.get(`${API_BASE_URL}/patients`, {
+      params: { q: query || undefined, after_id: afterId || undefined }
+    })
+
+  // Load the first page on mount and whenever the name search changes
   useEffect(() => {
-    axios.get(`${API_BASE_URL}/patients`)
+    let cancelled = false
+    const timer = setTimeout(() => {
+      fetchPatients(patientQuery)
+        .then(res => {
+          if (cancelled) return
+          setPatients(res.data)
+          setNextCursor(res.headers['x-next-cursor'] || null)
+          // Keep the current patient if it is still listed, otherwise select the first match
+          setSelectedPatientId(id =>
+            res.data.some(p => p.id === parseInt(id)) ? id : (res.data[0]?.id ?? ''))
+        })
+        .catch(err => console.error('Error fetching patients:', err))
+    }, patientQuery ? 250 : 0)
+    return () => { cancelled = true; clearTimeout(timer) }
+  }, [patientQuery])
+
+  const loadMorePatients = () => {
+    fetchPatients(patientQuery, nextCursor)
       .then(res => {
-        setPatients(res.data)
-        if (res.data.length > 0) setSelectedPatientId(res.data[0].id)
+        setPatients(prev => [...prev, ...res.data])
+        setNextCursor(res.headers['x-next-cursor'] || null)
       })
       .catch(err => console.error('Error fetching patients:', err))
-  }, [])
+  }
 
   const selectedPatient = useMemo(
     () => patients.find(p => p.id === parseInt(selectedPatientId)),
@@ -97,7 +122,7 @@ function App() {
     if (selectedPatient) {
       setMessages([{ role: 'assistant', content: `Hello! I'm ready to assist with patient **${selectedPatient.name}**. How can I help?` }])
     }
-  }, [selectedPatientId, patients]) // keep your original behavior
+  }, [selectedPatient?.id]) // not on every loaded page, which would wipe the chat
 
   // Auto scroll
   useEffect(() => {
@@ -191,9 +216,18 @@ function App() {
     <div className="app-container">
       <div className="sidebar">
         <h2>Patient Selection</h2>
+        <input
+          type="search"
+          placeholder="Search by name..."
+          value={patientQuery}
+          onChange={e => setPatientQuery(e.target.value)}
+        />
         <select value={selectedPatientId} onChange={e => setSelectedPatientId(e.target.value)}>
           {patients.map(p => <option key={p.id} value={p.id}>{p.name}</option>)}
         </select>
+        {nextCursor && (
+          <button type="button" className="load-more-btn" onClick={loadMorePatients}>Load more patients</button>
+        )}
       </div>
 
       <div className="chat-container">